@@ -1,10 +1,9 @@
 import sys
 import os
-import json
 import asyncio
 import time
-from datetime import datetime
-from typing import Dict, Any, List, Tuple
+import logging
+from typing import Dict, Tuple
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -12,11 +11,14 @@ sys.path.insert(0, os.path.abspath("tao_apy_calculator/src"))
 
 from utils.env import parse_env_data
 from bittensor import AsyncSubtensor
+import orjson
 
 from rich.progress import Progress, TimeElapsedColumn, SpinnerColumn
 from rich.console import Console
 
-from pymongo import MongoClient
+from bson import Int64
+from pymongo import UpdateOne
+from motor.motor_asyncio import AsyncIOMotorClient
 
 MONGO_URL = os.getenv("MONGO_URL")
 print("MONGO_URL: ", MONGO_URL)
@@ -29,13 +31,20 @@ else:
 
 print(f"Using MongoDB URL: {MONGO_URL}")
 
-client = MongoClient(MONGO_URL)
+# motor (async pymongo) keeps Mongo writes off the event loop so they overlap
+# with the in-flight Bittensor RPC fan-out instead of stalling it
+client = AsyncIOMotorClient(MONGO_URL)
 db = client["bittensor-api"]
 validators_collection = db["yield"]
 
 console = Console()
 
+# Per-(validator, subnet) tracing goes through a standard logger at DEBUG so
+# the hot loop does no styled-console I/O unless explicitly enabled
+logger = logging.getLogger(__name__)
+
 VALIDATOR_METADATA_PATH = "data/validator_metadata.json"
+SUBNET_IDS_CACHE_PATH = "data/subnet_ids.json"
 
 # Constants for APY calculations
 BLOCKS_PER_HOUR = 300  # Approximately 12 seconds per block
@@ -46,21 +55,41 @@ TIME_PERIODS = {
     "30d": 30 * 24 * 60 * 60,  # 30 days in seconds
 }
 
+# Annualization factor per window (365 / window-length-in-days), precomputed
+# once instead of re-deriving seconds→days→years on every calculate_apy call
+ANNUALIZATION = {period: 365 * 86400 / seconds for period, seconds in TIME_PERIODS.items()}
+
 # --- UTILS ---
-def load_json(path):
+def _read_bytes(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+async def load_json(path):
+    """Read and decode a JSON file without blocking the event loop."""
     if not os.path.exists(path) or os.stat(path).st_size == 0:
         return {}
     try:
-        with open(path, "r") as f:
-            return json.load(f)
-    except json.JSONDecodeError:
+        # File read happens in a worker thread; orjson decodes several times
+        # faster than stdlib json on the large metadata payloads
+        raw = await asyncio.to_thread(_read_bytes, path)
+        return orjson.loads(raw)
+    except orjson.JSONDecodeError:
         console.print(f"⚠️ Warning: Could not decode JSON from {path}, initializing empty data.", style="yellow")
         return {}
 
+# Session-level RPC timeout applied to the substrate client once per run,
+# replacing an asyncio.wait_for wrapper (Timer + Task allocation) per call
+RPC_TIMEOUT = 30.0
+
+def configure_rpc_timeout(subtensor):
+    """Apply the session-level timeout/retry policy to the substrate client."""
+    subtensor.substrate.retry_timeout = RPC_TIMEOUT
+    subtensor.substrate.max_retries = 1
+
 async def get_block_for_timestamp(subtensor, target_timestamp):
     """Get the closest block number for a given timestamp."""
     try:
-        current_block = await asyncio.wait_for(subtensor.block, timeout=30)
+        current_block = await subtensor.block
         current_timestamp = int(time.time())
         
         # Estimate blocks per second (Bittensor produces roughly 1 block every 12 seconds)
@@ -75,77 +104,144 @@ async def get_block_for_timestamp(subtensor, target_timestamp):
         console.print(f"[red]Error calculating historical block: {e}")
         return None
 
-async def get_stake(subtensor, hotkey, netuid, block):
-    """Get stake for a specific hotkey on a subnet at a given block."""
+# Stake maps keyed by (netuid, block): every validator in a sweep reuses the
+# same neurons fetch instead of re-pulling the whole subnet N times
+_neurons_cache: Dict[Tuple[int, int], Dict[str, int]] = {}
+_neurons_cache_locks: Dict[Tuple[int, int], asyncio.Lock] = {}
+
+def _neurons_to_hotkey_stake(neurons) -> Dict[str, int]:
+    """Index a neurons list into a hotkey→rao map, probing the shape once."""
+    # Neurons in a batch are homogeneous — probe the attribute shape once
+    # instead of paying hasattr/getattr dispatch on every iteration
+    if not neurons or not hasattr(neurons[0], 'hotkey'):
+        return {}
+    stake_is_balance = hasattr(getattr(neurons[0], 'stake', None), 'rao')
+    return {
+        neuron.hotkey: int(neuron.stake.rao if stake_is_balance else neuron.stake)
+        for neuron in neurons if neuron.stake
+    }
+
+async def _get_neurons_map(subtensor, netuid, block):
+    """Fetch all neurons for (netuid, block) once and return a hotkey→rao map."""
+    key = (netuid, block)
+    cached = _neurons_cache.get(key)
+    if cached is not None:
+        return cached
+
+    # Per-key lock so concurrent callers don't duplicate an in-flight fetch
+    lock = _neurons_cache_locks.setdefault(key, asyncio.Lock())
+    async with lock:
+        cached = _neurons_cache.get(key)
+        if cached is not None:
+            return cached
+
+        try:
+            # neurons_lite skips weights/bonds — we only need hotkey and stake,
+            # so there is no reason to transfer and SCALE-decode the full structs
+            neurons = await subtensor.neurons_lite(netuid, block=block)
+        except asyncio.TimeoutError:
+            console.print(f"[yellow]Timeout retrieving neurons for subnet {netuid} at block {block}[/yellow]")
+            return {}  # not cached: a later retry may succeed
+        except Exception as e:
+            console.print(f"[red]Error retrieving neurons for subnet {netuid} at block {block}: {e}[/red]")
+            return {}
+
+        stakes_map = _neurons_to_hotkey_stake(neurons)
+        _neurons_cache[key] = stakes_map
+        return stakes_map
+
+def _persist_subnet_ids(subnet_ids):
+    """Remember the last-known good subnet list for degraded-node runs."""
     try:
-        # Get all neurons and filter by hotkey (with timeout)
-        neurons = await asyncio.wait_for(
-            subtensor.neurons(netuid, block=block),
-            timeout=30  # 30 second timeout
-        )
-        
-        for neuron in neurons:
-            if hasattr(neuron, 'hotkey') and neuron.hotkey == hotkey:
-                if neuron.stake:
-                    return int(getattr(neuron.stake, "rao", neuron.stake))
-        return None
-    except asyncio.TimeoutError:
-        console.print(f"[yellow]Timeout retrieving neurons for subnet {netuid} at block {block}[/yellow]")
-        return None
+        os.makedirs(os.path.dirname(SUBNET_IDS_CACHE_PATH), exist_ok=True)
+        with open(SUBNET_IDS_CACHE_PATH, "wb") as f:
+            f.write(orjson.dumps(subnet_ids))
+    except OSError as e:
+        console.print(f"[yellow]Could not persist subnet list: {e}[/yellow]")
+
+async def fetch_subnet_ids(subtensor):
+    """Fetch the live subnet list with retries, falling back to the last
+    persisted list instead of probing a blind range of netuids.
+
+    Guessing `range(100)` used to issue neurons() calls for subnets that
+    do not exist, each burning a full RPC timeout on degraded nodes.
+    """
+    for attempt in range(3):
+        try:
+            subnets = await subtensor.get_subnets()
+        except Exception as e:
+            console.print(f"[yellow]get_subnets attempt {attempt + 1} failed: {e}[/yellow]")
+        else:
+            if isinstance(subnets, list):
+                subnet_ids = [s.netuid if hasattr(s, 'netuid') else s for s in subnets]
+                _persist_subnet_ids(subnet_ids)
+                return subnet_ids
+        await asyncio.sleep(2 ** attempt)
+
+    cached = await load_json(SUBNET_IDS_CACHE_PATH)
+    if cached:
+        console.print(f"[yellow]Using persisted subnet list ({len(cached)} subnets)[/yellow]")
+        return cached
+
+    # Last resort: cap the blind probe at the chain-reported subnet count
+    try:
+        total = await subtensor.get_total_subnets()
+        if total:
+            return list(range(total))
     except Exception as e:
-        console.print(f"[red]Error getting stake for subnet {netuid} at block {block}: {e}[/red]")
-        return None
+        console.print(f"[red]Could not determine subnet count: {e}[/red]")
+    return []
+
+async def get_stake(subtensor, hotkey, netuid, block):
+    """Get stake for a specific hotkey on a subnet at a given block."""
+    stakes_map = await _get_neurons_map(subtensor, netuid, block)
+    return stakes_map.get(hotkey)
 
-async def calculate_apy(current_stake, past_stake, time_period_seconds):
-    """Calculate APY based on current and past stake."""
+def calculate_apy(current_stake, past_stake, annualization):
+    """Calculate APY from current and past stake and a precomputed
+    annualization factor (see ANNUALIZATION)."""
     if not current_stake or not past_stake or past_stake == 0:
         return None
-    
-    # Calculate yield
+
+    # Calculate yield, annualize, and express as a percentage of past stake
     yield_amount = max(0, current_stake - past_stake)
-    
-    # Convert time period to days
-    time_period_days = time_period_seconds / (24 * 60 * 60)
-    
-    # Calculate annualized yield
-    annual_yield = yield_amount * (365 / time_period_days)
-    
-    # Calculate APY
-    apy = (annual_yield / past_stake) * 100
-    
-    return apy
-
-async def get_historical_stakes(subtensor, hotkey, netuid, current_block):
+    return (yield_amount * annualization / past_stake) * 100
+
+def compute_historical_blocks(current_block):
+    """Estimate the block number for each TIME_PERIODS window, once per sweep.
+
+    The estimate only depends on the current block and the ~12s block time,
+    so there is no reason to re-derive it per validator or per subnet.
+    """
+    return {
+        period: max(1, current_block - int(seconds / 12))
+        for period, seconds in TIME_PERIODS.items()
+    }
+
+async def get_historical_stakes(subtensor, hotkey, netuid, current_block, historical_blocks):
     """Get historical stakes for a validator on a specific subnet."""
     try:
-        console.log(f"🔎 Checking current stake for {hotkey[:8]} on subnet {netuid}")
-        
+        logger.debug("Checking current stake for %s on subnet %s", hotkey[:8], netuid)
+
         # Get current stake
         current_stake = await get_stake(subtensor, hotkey, netuid, current_block)
         if not current_stake:
-            console.log(f"⛔ No current stake found for {hotkey[:8]} on subnet {netuid}")
+            logger.debug("No current stake found for %s on subnet %s", hotkey[:8], netuid)
             return None, None, None, None, None, None
-        
-        # Get last stake (previous block)
+
+        # Fetch last stake (5 blocks ago) and the four historical stakes
+        # concurrently — the calls are independent RPCs
         last_block = max(1, current_block - 5)  # Get stake from 5 blocks ago as "last stake"
-        last_stake = await get_stake(subtensor, hotkey, netuid, last_block)
-        console.log(f"📊 Last stake (5 blocks ago): {last_stake if last_stake else 'None'}")
-            
-        # Get historical timestamp blocks
-        current_timestamp = int(time.time())
-        historical_blocks = {}
-        for period, seconds in TIME_PERIODS.items():
-            historical_timestamp = current_timestamp - seconds
-            historical_blocks[period] = await get_block_for_timestamp(subtensor, historical_timestamp)
-            console.log(f"📅 Block {period} ago: {historical_blocks[period]}")
-        
-        # Get historical stakes
-        stake_1h_ago = await get_stake(subtensor, hotkey, netuid, historical_blocks["1h"])
-        stake_24h_ago = await get_stake(subtensor, hotkey, netuid, historical_blocks["24h"])
-        stake_7d_ago = await get_stake(subtensor, hotkey, netuid, historical_blocks["7d"])
-        stake_30d_ago = await get_stake(subtensor, hotkey, netuid, historical_blocks["30d"])
-        
-        console.log(f"✅ Successfully retrieved historical stakes for {hotkey[:8]} on subnet {netuid}")
+        last_stake, stake_1h_ago, stake_24h_ago, stake_7d_ago, stake_30d_ago = await asyncio.gather(
+            get_stake(subtensor, hotkey, netuid, last_block),
+            get_stake(subtensor, hotkey, netuid, historical_blocks["1h"]),
+            get_stake(subtensor, hotkey, netuid, historical_blocks["24h"]),
+            get_stake(subtensor, hotkey, netuid, historical_blocks["7d"]),
+            get_stake(subtensor, hotkey, netuid, historical_blocks["30d"])
+        )
+        logger.debug("Last stake (5 blocks ago): %s", last_stake)
+
+        logger.debug("Retrieved historical stakes for %s on subnet %s", hotkey[:8], netuid)
         return current_stake, last_stake, stake_1h_ago, stake_24h_ago, stake_7d_ago, stake_30d_ago
     except Exception as e:
         console.print(f"[red]Error getting historical stakes for {hotkey} on subnet {netuid}: {e}")
@@ -163,10 +259,10 @@ async def calculate_hotkey_subnet_apy(subtensor, hotkey, netuid, stakes):
         monthly_yield = max(0, current_stake - (stake_30d_ago or current_stake))
         
         # Calculate APYs
-        hourly_apy = await calculate_apy(current_stake, stake_1h_ago, TIME_PERIODS["1h"]) if stake_1h_ago else None
-        daily_apy = await calculate_apy(current_stake, stake_24h_ago, TIME_PERIODS["24h"]) if stake_24h_ago else None
-        weekly_apy = await calculate_apy(current_stake, stake_7d_ago, TIME_PERIODS["7d"]) if stake_7d_ago else None
-        monthly_apy = await calculate_apy(current_stake, stake_30d_ago, TIME_PERIODS["30d"]) if stake_30d_ago else None
+        hourly_apy = calculate_apy(current_stake, stake_1h_ago, ANNUALIZATION["1h"]) if stake_1h_ago else None
+        daily_apy = calculate_apy(current_stake, stake_24h_ago, ANNUALIZATION["24h"]) if stake_24h_ago else None
+        weekly_apy = calculate_apy(current_stake, stake_7d_ago, ANNUALIZATION["7d"]) if stake_7d_ago else None
+        monthly_apy = calculate_apy(current_stake, stake_30d_ago, ANNUALIZATION["30d"]) if stake_30d_ago else None
         
         return {
             "lastStake": last_stake,
@@ -193,138 +289,268 @@ async def calculate_hotkey_subnet_apy(subtensor, hotkey, netuid, stakes):
             "monthlyApy": None
         }
 
-async def process_subnet_for_validator(subtensor, hotkey, netuid, validator_metadata, block, timestamp):
-    """Process a single subnet for a validator and store in MongoDB."""
+# Last-written base fields per hotkey: lets repeat sweeps in the same process
+# skip rewriting the 10-field base document when the metadata didn't change
+_base_fields_seen: Dict[str, tuple] = {}
+
+def build_validator_base(hotkey, validator_metadata, timestamp):
+    """Build the base document for a validator from its metadata."""
+    return {
+        "id": validator_metadata.get("id", 0),
+        "hotkey": hotkey,
+        "coldkey": validator_metadata.get("coldkey", ""),
+        "take": validator_metadata.get("take", "0.0"),
+        "verified": validator_metadata.get("verified", False),
+        "name": validator_metadata.get("name", f"Validator {hotkey[:8]}"),
+        "logo": validator_metadata.get("logo"),
+        "url": validator_metadata.get("url"),
+        "description": validator_metadata.get("description", "Validator on Bittensor network"),
+        "verifiedBadge": validator_metadata.get("verifiedBadge", False),
+        "twitter": validator_metadata.get("twitter"),
+        "last_updated": timestamp
+    }
+
+async def process_subnet_for_validator(subtensor, hotkey, netuid, block, historical_blocks):
+    """Process a single subnet for a validator and return its prepared subnet data.
+
+    Returns the subnet_data dict for an active stake, or None. Writing is left
+    to the caller so all subnets of a validator land in one bulk_write.
+    """
     try:
-        console.log(f"📥 Checking stake for {hotkey[:8]} on subnet {netuid}")
-        
+        logger.debug("Checking stake for %s on subnet %s", hotkey[:8], netuid)
+
         # Get current and historical stakes
-        stakes = await get_historical_stakes(subtensor, hotkey, netuid, block)
+        stakes = await get_historical_stakes(subtensor, hotkey, netuid, block, historical_blocks)
         if not stakes or stakes[0] is None:
-            console.log(f"⚠️ No stake data for {hotkey[:8]} on subnet {netuid}")
-            return False
+            logger.debug("No stake data for %s on subnet %s", hotkey[:8], netuid)
+            return None
 
         current_stake, last_stake, stake_1h_ago, stake_24h_ago, stake_7d_ago, stake_30d_ago = stakes
-        
+
         if current_stake > 0:
-            console.log(f"✅ Active stake found on subnet {netuid}: {current_stake}")
-            
+            logger.debug("Active stake found on subnet %s: %s", netuid, current_stake)
+
             # Calculate APY data
-            console.log(f"📊 Calculating APY for {hotkey[:8]} on subnet {netuid}")
+            logger.debug("Calculating APY for %s on subnet %s", hotkey[:8], netuid)
             apy_data = await calculate_hotkey_subnet_apy(subtensor, hotkey, netuid, stakes)
-            
-            # Create validator base data if it doesn't exist in MongoDB
-            validator_base = {
-                "id": validator_metadata.get("id", 0),
-                "hotkey": hotkey,
-                "coldkey": validator_metadata.get("coldkey", ""),
-                "take": validator_metadata.get("take", "0.0"),
-                "verified": validator_metadata.get("verified", False),
-                "name": validator_metadata.get("name", f"Validator {hotkey[:8]}"),
-                "logo": validator_metadata.get("logo"),
-                "url": validator_metadata.get("url"),
-                "description": validator_metadata.get("description", "Validator on Bittensor network"),
-                "verifiedBadge": validator_metadata.get("verifiedBadge", False),
-                "twitter": validator_metadata.get("twitter"),
-                "last_updated": timestamp
-            }
-            
-            # Create or update base document for this validator if it doesn't exist
-            validators_collection.update_one(
-                {"hotkey": hotkey},
-                {"$set": validator_base},
-                upsert=True
-            )
-            console.log(f"✅ Updated validator base data for {hotkey} in MongoDB")
-            
-            # Prepare subnet data
+
+            # Prepare subnet data: rao amounts stay integers (BSON int64) and
+            # APYs become doubles — strings doubled document size and blocked
+            # server-side numeric sorts; formatting belongs to the HTTP layer
             subnet_data = {
-                "latestStake": str(current_stake),
-                "lastStake": None if last_stake is None else str(last_stake),
-                "stake1hAgo": None if stake_1h_ago is None else str(stake_1h_ago),
-                "stake24hAgo": None if stake_24h_ago is None else str(stake_24h_ago),
-                "stake7dAgo": None if stake_7d_ago is None else str(stake_7d_ago),
-                "stake30dAgo": None if stake_30d_ago is None else str(stake_30d_ago),
-                "hourlyYield": None if apy_data["hourlyYield"] is None else str(apy_data["hourlyYield"]),
-                "dailyYield": None if apy_data["dailyYield"] is None else str(apy_data["dailyYield"]),
-                "weeklyYield": None if apy_data["weeklyYield"] is None else str(apy_data["weeklyYield"]),
-                "monthlyYield": None if apy_data["monthlyYield"] is None else str(apy_data["monthlyYield"]),
-                "hourlyApy": None if apy_data["hourlyApy"] is None else f"{apy_data['hourlyApy']:.2f}",
-                "dailyApy": None if apy_data["dailyApy"] is None else f"{apy_data['dailyApy']:.2f}",
-                "weeklyApy": None if apy_data["weeklyApy"] is None else f"{apy_data['weeklyApy']:.2f}",
-                "monthlyApy": None if apy_data["monthlyApy"] is None else f"{apy_data['monthlyApy']:.2f}"
+                "latestStake": current_stake,
+                "lastStake": last_stake,
+                "stake1hAgo": stake_1h_ago,
+                "stake24hAgo": stake_24h_ago,
+                "stake7dAgo": stake_7d_ago,
+                "stake30dAgo": stake_30d_ago,
+                "hourlyYield": apy_data["hourlyYield"],
+                "dailyYield": apy_data["dailyYield"],
+                "weeklyYield": apy_data["weeklyYield"],
+                "monthlyYield": apy_data["monthlyYield"],
+                "hourlyApy": None if apy_data["hourlyApy"] is None else round(apy_data["hourlyApy"], 4),
+                "dailyApy": None if apy_data["dailyApy"] is None else round(apy_data["dailyApy"], 4),
+                "weeklyApy": None if apy_data["weeklyApy"] is None else round(apy_data["weeklyApy"], 4),
+                "monthlyApy": None if apy_data["monthlyApy"] is None else round(apy_data["monthlyApy"], 4)
             }
-            
-            # Update the subnet data in MongoDB
-            validators_collection.update_one(
-                {"hotkey": hotkey},
-                {"$set": {
-                    f"subnetsData.{netuid}": subnet_data,
-                    str(netuid): subnet_data,  # For backward compatibility
-                    "last_updated": timestamp
-                }}
-            )
-            console.log(f"💾 Stored subnet {netuid} data for {hotkey} in MongoDB")
-            return True
+            return subnet_data
         else:
-            console.log(f"⚠️ No active stake for {hotkey[:8]} on subnet {netuid}")
-            return False
+            logger.debug("No active stake for %s on subnet %s", hotkey[:8], netuid)
+            return None
     except Exception as e:
         console.print(f"[red]Error processing subnet {netuid} for {hotkey}: {e}")
-        return False
+        return None
+
+# Per-subnet fields that current sweeps store as BSON numbers; legacy
+# documents carry them as decimal strings
+STAKE_KEYS = ("latestStake", "lastStake", "stake1hAgo", "stake24hAgo",
+              "stake7dAgo", "stake30dAgo", "hourlyYield", "dailyYield",
+              "weeklyYield", "monthlyYield")
+APY_KEYS = ("hourlyApy", "dailyApy", "weeklyApy", "monthlyApy")
+
+async def migrate_string_stakes():
+    """One-shot migration: convert legacy string subnet fields to BSON numbers.
+
+    Strings force an int() per field on every API request and roughly double
+    the stored size; numbers also let Mongo aggregate server-side. No-op once
+    every document has been rewritten.
+    """
+    ops = []
+    async for doc in validators_collection.find({}, {"subnetsData": 1}):
+        updates = {}
+        for sid, subnet_data in (doc.get("subnetsData") or {}).items():
+            for key in STAKE_KEYS:
+                value = subnet_data.get(key)
+                if isinstance(value, str):
+                    try:
+                        updates[f"subnetsData.{sid}.{key}"] = Int64(value)
+                    except ValueError:
+                        pass
+            for key in APY_KEYS:
+                value = subnet_data.get(key)
+                if isinstance(value, str):
+                    try:
+                        updates[f"subnetsData.{sid}.{key}"] = round(float(value), 4)
+                    except ValueError:
+                        pass
+        if updates:
+            ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": updates}))
+
+    if ops:
+        result = await validators_collection.bulk_write(ops, ordered=False)
+        console.print(f"🔁 Migrated legacy string fields on {result.modified_count} documents")
 
 async def main():
-    metadata = load_json(VALIDATOR_METADATA_PATH)
+    metadata = await load_json(VALIDATOR_METADATA_PATH)
     if not metadata:
         console.print("❌ No validator metadata found. Please run metadata_sync.py first.", style="red")
         return
 
-    timestamp = datetime.now().isoformat()
-    [node_url, batch_size] = parse_env_data()
+    # The cache only pays off within one sweep (every validator shares the
+    # same (netuid, block) fetches); the next sweep targets new blocks, so
+    # drop the old maps and locks instead of accumulating them for the
+    # life of the process
+    _neurons_cache.clear()
+    _neurons_cache_locks.clear()
+
+    # Epoch milliseconds as BSON Int64: 8 bytes instead of a 26-char ISO
+    # string, and range-indexable for "recently updated" queries
+    timestamp = Int64(time.time() * 1000)
+    node_url, batch_size = parse_env_data()
+
+    # Every write matches on hotkey; without an index that is a full
+    # collection scan per validator. Index creation is a no-op once built.
+    try:
+        await validators_collection.create_index([("hotkey", 1)], unique=True)
+        # The API sorts on total_stake; a descending index turns that into
+        # an index scan instead of an in-memory sort
+        await validators_collection.create_index([("total_stake", -1)])
+    except Exception as e:
+        console.print(f"[yellow]Could not ensure indexes: {e}[/yellow]")
 
     console.print(f"🚀 Starting validator data collection with node URL: {node_url}", style="green")
     async with AsyncSubtensor(node_url) as subtensor:
         try:
-            block = await asyncio.wait_for(subtensor.block, timeout=30)
+            configure_rpc_timeout(subtensor)
+            block = await subtensor.block
             console.print(f"🟢 Connected to Bittensor at block {block}", style="green")
             console.print(f"🔍 Found {len(metadata)} validators in metadata", style="cyan")
 
-            # Get subnet list with timeout
+            # One (period → block) LUT for the whole sweep
+            historical_blocks = compute_historical_blocks(block)
+            for period, historical_block in historical_blocks.items():
+                console.print(f"📅 Block {period} ago: {historical_block}")
+
+            # Get subnet list with retries and a persisted fallback
             console.print("[bold blue]Retrieving subnet list...[/bold blue]")
-            subnets = await asyncio.wait_for(subtensor.get_subnets(), timeout=30)
-            
-            if isinstance(subnets, list):
-                subnet_ids = [s.netuid if hasattr(s, 'netuid') else s for s in subnets]
-            else:
-                subnet_ids = list(range(100))  # Fallback to checking first 100 subnet IDs
-                
+            subnet_ids = await fetch_subnet_ids(subtensor)
             console.print(f"📡 Found {len(subnet_ids)} potential subnets")
 
+            # One-shot migration: older sweeps duplicated every subnet's data
+            # under a bare "{netuid}" key next to subnetsData.{netuid},
+            # doubling document size. Strip the legacy copies.
+            legacy_unset = {str(netuid): "" for netuid in subnet_ids}
+            if legacy_unset:
+                await validators_collection.update_many({}, {"$unset": legacy_unset})
+
+            # Rewrite any remaining string-typed stake/APY fields as numbers
+            await migrate_string_stakes()
+
+            # Bound concurrent subnet fan-out so the node isn't flooded
+            semaphore = asyncio.Semaphore(batch_size)
+
+            # Preflight: warm each subnet's current-block stake map once and
+            # remember which hotkeys appear on which subnet. The vast majority
+            # of (validator, subnet) pairs have no stake, so they can be
+            # skipped before a single historical RPC is scheduled.
+            console.print("[bold blue]Prefetching current stake maps...[/bold blue]")
+
+            async def fetch_current_map(netuid):
+                async with semaphore:
+                    return netuid, await _get_neurons_map(subtensor, netuid, block)
+
+            current_maps = dict(await asyncio.gather(*(
+                fetch_current_map(netuid) for netuid in subnet_ids
+            )))
+
             with Progress(SpinnerColumn(), *Progress.get_default_columns(), TimeElapsedColumn(), console=console) as progress:
                 task = progress.add_task("[cyan]Processing validators...", total=len(metadata))
                 count_validators_processed = 0
                 count_active_subnets = 0
 
+                async def process_subnet_bounded(hotkey, netuid):
+                    async with semaphore:
+                        return netuid, await process_subnet_for_validator(
+                            subtensor, hotkey, netuid, block, historical_blocks
+                        )
+
                 for i, (hotkey, info) in enumerate(metadata.items(), 1):
                     progress.update(task, description=f"[cyan]Validator {i}/{len(metadata)}: {hotkey[:8]}")
                     try:
-                        validator_has_active_subnet = False
-                        
-                        # Process each subnet for this validator
-                        for netuid in subnet_ids:
-                            subnet_processed = await process_subnet_for_validator(
-                                subtensor, hotkey, netuid, info, block, timestamp
-                            )
-                            if subnet_processed:
-                                validator_has_active_subnet = True
+                        # Accumulate all subnet updates for this validator into
+                        # one $set document instead of two update_one calls per
+                        # subnet (O(subnets × 2) Mongo round-trips → 1)
+                        set_doc = build_validator_base(hotkey, info, timestamp)
+                        # id and coldkey never change for a hotkey — write them
+                        # only when the document is first inserted instead of
+                        # rewriting them every sweep
+                        set_on_insert = {
+                            "id": set_doc.pop("id"),
+                            "coldkey": set_doc.pop("coldkey")
+                        }
+
+                        # Skip the base fields entirely when this process already
+                        # wrote the exact same metadata on a previous sweep
+                        base_key = tuple(sorted(
+                            (k, v) for k, v in set_doc.items() if k != "last_updated"
+                        ))
+                        if _base_fields_seen.get(hotkey) == base_key:
+                            set_doc = {"last_updated": timestamp}
+                        else:
+                            _base_fields_seen[hotkey] = base_key
+
+                        active_subnet_count = 0
+
+                        # Only fan out to subnets where the preflight saw a
+                        # current stake for this hotkey
+                        active_subnets = [
+                            netuid for netuid in subnet_ids
+                            if current_maps.get(netuid, {}).get(hotkey)
+                        ]
+
+                        # total_stake only changes when a sweep runs, so it is
+                        # precomputed here (from the preflight maps, which cover
+                        # every subnet) rather than per API request
+                        set_doc["total_stake"] = Int64(sum(
+                            current_maps.get(netuid, {}).get(hotkey, 0)
+                            for netuid in subnet_ids
+                        ))
+
+                        # Process the active subnets for this validator concurrently
+                        results = await asyncio.gather(*(
+                            process_subnet_bounded(hotkey, netuid) for netuid in active_subnets
+                        ))
+                        for netuid, subnet_data in results:
+                            if subnet_data is not None:
+                                set_doc[f"subnetsData.{netuid}"] = subnet_data
+                                active_subnet_count += 1
                                 count_active_subnets += 1
-                        
-                        if validator_has_active_subnet:
+
+                        if active_subnet_count > 0:
+                            await validators_collection.bulk_write(
+                                [UpdateOne(
+                                    {"hotkey": hotkey},
+                                    {"$set": set_doc, "$setOnInsert": set_on_insert},
+                                    upsert=True
+                                )],
+                                ordered=False
+                            )
+                            logger.debug("Stored %s subnets for %s in MongoDB", active_subnet_count, hotkey)
                             count_validators_processed += 1
                             console.print(f"✅ Processed validator {hotkey[:8]} | {info.get('name', 'Unknown')}")
                         else:
                             console.print(f"⚠️ No active subnets for validator {hotkey[:8]}")
-                            
+
                     except Exception as e:
                         console.print(f"❌ Error processing validator {hotkey}: {e}", style="red")
                     progress.update(task, advance=1)
@@ -1,20 +1,22 @@
 import asyncio
 import threading
-import json
-from fastapi import FastAPI, Query, Request, Response
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, Query, Request
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
+import orjson
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 import time
 import os
-from pymongo import MongoClient
 from pymongo.errors import CollectionInvalid
-from datetime import datetime
+from motor.motor_asyncio import AsyncIOMotorClient
+from datetime import datetime, timezone
 from dotenv import load_dotenv
-from typing import Optional, List, Dict, Any
+from typing import Optional
+import numpy as np
 from bittensor import AsyncSubtensor
 
-import asyncio
+import apy_calculator
+import metadata_sync
 
 # Chargement des variables d'environnement
 load_dotenv()
@@ -29,147 +31,221 @@ else:
     print("✅ Using external MongoDB:", MONGO_URL)
 
 print(f"Using MongoDB URL: {MONGO_URL}")
-client = MongoClient(MONGO_URL)
+# motor keeps Mongo I/O off the event loop so async handlers overlap
+# requests instead of pinning one threadpool worker each. The pool is sized
+# for the per-worker request concurrency and the wire is compressed: the
+# repetitive BSON documents compress well, cutting round-trip bytes.
+# Compressors are negotiated — unsupported ones are simply skipped.
+client = AsyncIOMotorClient(
+    MONGO_URL,
+    maxPoolSize=200,
+    compressors="zstd,snappy,zlib",
+    retryReads=True,
+    appname="bittensor-api",
+)
 db = client["bittensor-api"]
 validators_collection = db["yield"]
-
-# Create subnets collection if it doesn't exist
-try:
-    subnets_collection = db.create_collection("subnets")
-    print("Created subnets collection")
-except CollectionInvalid:
-    # Collection already exists
-    subnets_collection = db["subnets"]
-    print("Using existing subnets collection")
+subnets_collection = db["subnets"]
 
 # Intervalle en secondes pour la mise à jour
 UPDATE_METADATA_INTERVAL = 3600  # 1 heure
 UPDATE_APY_INTERVAL = 1800       # 30 minutes
 
+# Annualization factors for the 1h / 24h / 7d / 30d yield windows,
+# precomputed once so APYs can be derived in a single vectorized expression
+APY_ANNUALIZATION = np.array([24 * 365, 365, 365 / 7, 365 / 30], dtype=np.float64)
+
 # --- FONCTIONS DE MISE À JOUR (APPELLES EN BACKGROUND) ---
+# Les mises à jour tournent désormais dans le processus principal: pas de
+# fork + démarrage d'interpréteur + ré-import des dépendances à chaque tick
 
-def run_metadata_updater():
+async def periodic_metadata_update():
     while True:
         try:
             print(f"[{datetime.now()}] Running metadata updater...")
-            os.system("python metadata_sync.py")
+            # sync_metadata is synchronous (bittensor sync client) — run it
+            # in a worker thread so the updater loop stays responsive
+            await asyncio.to_thread(metadata_sync.sync_metadata)
             print(f"[{datetime.now()}] Metadata update completed")
         except Exception as e:
             print(f"[{datetime.now()}] Error in metadata updater: {e}")
-        time.sleep(UPDATE_METADATA_INTERVAL)
+        await asyncio.sleep(UPDATE_METADATA_INTERVAL)
 
-def run_apy_updater():
+async def periodic_apy_update():
     while True:
         try:
             print(f"[{datetime.now()}] Running APY calculator...")
-            os.system("python apy_calculator.py")
+            await apy_calculator.main()
             print(f"[{datetime.now()}] APY calculation completed")
         except Exception as e:
             print(f"[{datetime.now()}] Error in APY updater: {e}")
-        time.sleep(UPDATE_APY_INTERVAL)
+        await asyncio.sleep(UPDATE_APY_INTERVAL)
+
+async def periodic_updates():
+    await asyncio.gather(periodic_metadata_update(), periodic_apy_update())
+
+def run_updaters():
+    asyncio.run(periodic_updates())
 
 # --- FONCTIONS UTILITAIRES ---
 
+def parse_stake(value):
+    """Normalize a stored stake/yield value to int.
+
+    Documents written by current sweeps carry BSON int64; older documents
+    carry decimal strings. Anything else maps to None.
+    """
+    if isinstance(value, int):
+        return value
+    # Single int() walk instead of isdigit() + int() traversing the string
+    # twice; the exception path only triggers for None/garbage values
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+# Only the fields the listing endpoints actually return; anything else on
+# the documents stays in Mongo instead of crossing the wire and paying BSON
+# decode time
+VALIDATOR_PROJECTION = {
+    "_id": 0, "id": 1, "hotkey": 1, "coldkey": 1, "take": 1, "verified": 1,
+    "name": 1, "logo": 1, "url": 1, "description": 1, "verifiedBadge": 1,
+    "twitter": 1, "last_updated": 1, "subnetsData": 1, "total_stake": 1,
+    "aggregates": 1,
+}
+
+def stake_sum_expr(field):
+    """Aggregation expression summing one subnetsData field across subnets.
+
+    $convert with onError/onNull 0 accepts both BSON int64 and legacy
+    decimal-string values, mirroring parse_stake.
+    """
+    return {"$sum": {"$map": {
+        "input": {"$objectToArray": {"$ifNull": ["$subnetsData", {}]}},
+        "as": "s",
+        "in": {"$convert": {"input": f"$$s.v.{field}", "to": "long",
+                            "onError": 0, "onNull": 0}}
+    }}}
+
 def calculate_total_stake(validator_doc):
     """Calculate total stake across all subnets for a validator."""
     total_stake = 0
     subnets_data = validator_doc.get("subnetsData", {})
-    
+
     for subnet_id, subnet_data in subnets_data.items():
-        latest_stake = subnet_data.get("latestStake")
-        if latest_stake and latest_stake.isdigit():
-            total_stake += int(latest_stake)
-    
+        latest_stake = parse_stake(subnet_data.get("latestStake"))
+        if latest_stake:
+            total_stake += latest_stake
+
     return total_stake
 
 def get_subnet_stake(validator_doc, subnet_id):
     """Get stake for a specific subnet, or 0 if not present."""
     subnets_data = validator_doc.get("subnetsData", {})
     subnet_data = subnets_data.get(str(subnet_id), {})
-    latest_stake = subnet_data.get("latestStake", "0")
-    
-    if latest_stake and latest_stake.isdigit():
-        return int(latest_stake)
-    return 0
+    latest_stake = parse_stake(subnet_data.get("latestStake"))
+
+    return latest_stake if latest_stake else 0
+
+def format_last_updated(value):
+    """Render a stored last_updated value as an ISO timestamp.
+
+    The updater now stores epoch milliseconds (Int64); older documents
+    still carry ISO strings, which pass through unchanged.
+    """
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value / 1000, tz=timezone.utc).isoformat()
+    return value
+
+def display_name(doc):
+    """Validator display name, building the fallback template only when needed.
+
+    dict.get(key, default) evaluates the default eagerly, so the f-string was
+    formatted for every document even when a name was present.
+    """
+    if "name" in doc:
+        return doc["name"]
+    return f"Validator {doc.get('hotkey', '')[:8]}"
+
+# Constant skeleton of a formatted validator: one dict copy plus targeted
+# overwrites instead of a dozen doc.get(key, default) dispatches per document
+FORMAT_DEFAULTS = {
+    "id": None,
+    "hotkey": None,
+    "coldkey": "",
+    "take": "0.0",
+    "verified": False,
+    "logo": None,
+    "url": None,
+    "description": "Validator on Bittensor network",
+    "verifiedBadge": False,
+    "twitter": None,
+}
+FORMAT_COPY_KEYS = tuple(FORMAT_DEFAULTS)
+
+def format_validator_base(doc):
+    """Identity/metadata portion of a formatted validator document."""
+    out = dict(FORMAT_DEFAULTS)
+    for key in FORMAT_COPY_KEYS:
+        if key in doc:
+            out[key] = doc[key]
+    out["name"] = display_name(doc)
+    out["last_updated"] = format_last_updated(doc.get("last_updated"))
+    return out
+
+def subnet_column(subnet_rows, field):
+    """Extract one numeric field across all subnets as a packed int64 array."""
+    return np.fromiter(
+        (v for v in (parse_stake(row.get(field)) for row in subnet_rows) if v is not None),
+        dtype=np.int64
+    )
 
 def aggregate_subnet_data(validator_doc):
     """Aggregate data across all subnets to get top-level metrics."""
     subnets_data = validator_doc.get("subnetsData", {})
-    
-    # Initialize aggregated values
-    latest_stake_total = 0
-    stake_1h_ago_total = 0
-    stake_24h_ago_total = 0
-    stake_7d_ago_total = 0
-    stake_30d_ago_total = 0
-    
-    hourly_yield_total = 0
-    daily_yield_total = 0
-    weekly_yield_total = 0
-    monthly_yield_total = 0
-    
+
+    # Flatten the per-subnet dicts into one packed array per field (SoA layout)
+    # instead of walking every dict once per field
+    subnet_rows = list(subnets_data.values())
+
+    latest_stakes = subnet_column(subnet_rows, "latestStake")
+    stakes_1h = subnet_column(subnet_rows, "stake1hAgo")
+    stakes_24h = subnet_column(subnet_rows, "stake24hAgo")
+    stakes_7d = subnet_column(subnet_rows, "stake7dAgo")
+    stakes_30d = subnet_column(subnet_rows, "stake30dAgo")
+
+    latest_stake_total = int(latest_stakes.sum())
+    stake_1h_ago_total = int(stakes_1h.sum())
+    stake_24h_ago_total = int(stakes_24h.sum())
+    stake_7d_ago_total = int(stakes_7d.sum())
+    stake_30d_ago_total = int(stakes_30d.sum())
+
+    hourly_yield_total = int(subnet_column(subnet_rows, "hourlyYield").sum())
+    daily_yield_total = int(subnet_column(subnet_rows, "dailyYield").sum())
+    weekly_yield_total = int(subnet_column(subnet_rows, "weeklyYield").sum())
+    monthly_yield_total = int(subnet_column(subnet_rows, "monthlyYield").sum())
+
     # Count how many subnets have data for each time period for avg calculation
-    hourly_count = 0
-    daily_count = 0
-    weekly_count = 0
-    monthly_count = 0
-    
-    # Aggregate data from all subnets
-    for subnet_id, subnet_data in subnets_data.items():
-        # Aggregate stake data
-        if subnet_data.get("latestStake") and subnet_data["latestStake"].isdigit():
-            latest_stake_total += int(subnet_data["latestStake"])
-        
-        if subnet_data.get("stake1hAgo") and subnet_data["stake1hAgo"].isdigit():
-            stake_1h_ago_total += int(subnet_data["stake1hAgo"])
-            hourly_count += 1
-        
-        if subnet_data.get("stake24hAgo") and subnet_data["stake24hAgo"].isdigit():
-            stake_24h_ago_total += int(subnet_data["stake24hAgo"])
-            daily_count += 1
-        
-        if subnet_data.get("stake7dAgo") and subnet_data["stake7dAgo"].isdigit():
-            stake_7d_ago_total += int(subnet_data["stake7dAgo"])
-            weekly_count += 1
-        
-        if subnet_data.get("stake30dAgo") and subnet_data["stake30dAgo"].isdigit():
-            stake_30d_ago_total += int(subnet_data["stake30dAgo"])
-            monthly_count += 1
-        
-        # Aggregate yield data
-        if subnet_data.get("hourlyYield") and subnet_data["hourlyYield"].isdigit():
-            hourly_yield_total += int(subnet_data["hourlyYield"])
-        
-        if subnet_data.get("dailyYield") and subnet_data["dailyYield"].isdigit():
-            daily_yield_total += int(subnet_data["dailyYield"])
-        
-        if subnet_data.get("weeklyYield") and subnet_data["weeklyYield"].isdigit():
-            weekly_yield_total += int(subnet_data["weeklyYield"])
-        
-        if subnet_data.get("monthlyYield") and subnet_data["monthlyYield"].isdigit():
-            monthly_yield_total += int(subnet_data["monthlyYield"])
-    
-    # Calculate APYs
-    hourly_apy = None
-    daily_apy = None
-    weekly_apy = None
-    monthly_apy = None
-    
-    if hourly_count > 0 and stake_1h_ago_total > 0:
-        hourly_yield_annualized = hourly_yield_total * 24 * 365
-        hourly_apy = round((hourly_yield_annualized / stake_1h_ago_total) * 100, 2)
-    
-    if daily_count > 0 and stake_24h_ago_total > 0:
-        daily_yield_annualized = daily_yield_total * 365
-        daily_apy = round((daily_yield_annualized / stake_24h_ago_total) * 100, 2)
-    
-    if weekly_count > 0 and stake_7d_ago_total > 0:
-        weekly_yield_annualized = weekly_yield_total * (365 / 7)
-        weekly_apy = round((weekly_yield_annualized / stake_7d_ago_total) * 100, 2)
-    
-    if monthly_count > 0 and stake_30d_ago_total > 0:
-        monthly_yield_annualized = monthly_yield_total * (365 / 30)
-        monthly_apy = round((monthly_yield_annualized / stake_30d_ago_total) * 100, 2)
+    hourly_count = stakes_1h.size
+    daily_count = stakes_24h.size
+    weekly_count = stakes_7d.size
+    monthly_count = stakes_30d.size
+    
+    # Calculate all four APYs in one vectorized expression
+    yields = np.array([hourly_yield_total, daily_yield_total,
+                       weekly_yield_total, monthly_yield_total], dtype=np.float64)
+    past_stakes = np.array([stake_1h_ago_total, stake_24h_ago_total,
+                            stake_7d_ago_total, stake_30d_ago_total], dtype=np.float64)
+    counts = np.array([hourly_count, daily_count, weekly_count, monthly_count])
+
+    valid = (counts > 0) & (past_stakes > 0)
+    apys = np.full(4, np.nan)
+    if valid.any():
+        apys[valid] = np.round((yields[valid] * APY_ANNUALIZATION[valid] / past_stakes[valid]) * 100, 2)
+
+    hourly_apy, daily_apy, weekly_apy, monthly_apy = [
+        None if np.isnan(apy) else float(apy) for apy in apys
+    ]
     
     return {
         "latestStake": str(latest_stake_total) if latest_stake_total > 0 else None,
@@ -187,11 +263,122 @@ def aggregate_subnet_data(validator_doc):
         "monthlyApy": str(monthly_apy) if monthly_apy is not None else None
     }
 
+# Listing responses only change on the 30-minute updater tick, so identical
+# query strings are answered from a short-TTL per-process cache instead of
+# re-querying Mongo and re-aggregating (same shape as the /api/subnets cache)
+RESPONSE_CACHE_TTL = 60.0
+RESPONSE_CACHE_MAX = 512
+_response_cache = {}
+
+def response_cache_get(key):
+    entry = _response_cache.get(key)
+    if entry is not None and time.monotonic() < entry[0]:
+        return entry[1]
+    return None
+
+def response_cache_put(key, value):
+    if len(_response_cache) >= RESPONSE_CACHE_MAX:
+        _response_cache.clear()
+    _response_cache[key] = (time.monotonic() + RESPONSE_CACHE_TTL, value)
+
+METADATA_PATH = os.path.join("data", "validator_metadata.json")
+
+# Validator metadata cached against the file's mtime: the file only changes
+# on the hourly metadata sync, so per-request reads are almost always hits
+_metadata_cache = {"mtime": None, "data": {}}
+
+def load_validator_metadata():
+    """Return the validator metadata file, re-reading it only when it changed."""
+    try:
+        mtime = os.stat(METADATA_PATH).st_mtime
+    except OSError:
+        return {}
+    if mtime != _metadata_cache["mtime"]:
+        with open(METADATA_PATH, "rb") as f:
+            _metadata_cache["data"] = orjson.loads(f.read())
+        _metadata_cache["mtime"] = mtime
+    return _metadata_cache["data"]
+
+# Aggregates only change when the APY updater rewrites a document, so they
+# are cached per (hotkey, last_updated): a new sweep bumps last_updated and
+# naturally invalidates the entry
+AGGREGATE_CACHE_MAX = 4096
+_aggregate_cache = {}
+
+def cached_aggregate_subnet_data(doc):
+    """Return per-window aggregates for a validator document.
+
+    Prefers an `aggregates` sub-document precomputed at write time, then a
+    process-local cache, and only then recomputes from subnetsData.
+    """
+    precomputed = doc.get("aggregates")
+    if precomputed is not None:
+        return precomputed
+
+    hotkey = doc.get("hotkey")
+    last_updated = doc.get("last_updated")
+    if hotkey is None or last_updated is None:
+        return aggregate_subnet_data(doc)
+
+    key = (hotkey, last_updated)
+    cached = _aggregate_cache.get(key)
+    if cached is None:
+        if len(_aggregate_cache) >= AGGREGATE_CACHE_MAX:
+            _aggregate_cache.clear()
+        cached = _aggregate_cache[key] = aggregate_subnet_data(doc)
+    return cached
+
+def _page_stages(batch, batch_size, limit):
+    """$facet sub-pipeline selecting the requested page of documents.
+
+    Returns None when no pagination applies; that case must bypass the
+    $facet (see run_listing_pipeline).
+    """
+    if batch is not None and isinstance(batch, int) and batch >= 0:
+        return [{"$skip": batch * batch_size}, {"$limit": batch_size}]
+    if limit is not None and isinstance(limit, int) and limit > 0:
+        return [{"$limit": limit}]
+    return None
+
+async def run_listing_pipeline(pipeline, batch, batch_size, limit):
+    """Append the pagination $facet and run the pipeline.
+
+    Returns the page of documents and the pre-pagination total, fetched in
+    the same round-trip. Unpaginated queries skip the $facet entirely: a
+    $facet output is a single document capped at 16 MB, which a full
+    collection listing can exceed, while a plain cursor has no such
+    limit — and with no skip or limit applied the total is just the
+    result length.
+    """
+    page_stages = _page_stages(batch, batch_size, limit)
+    if page_stages is None:
+        docs = await validators_collection.aggregate(pipeline).to_list(length=None)
+        return docs, len(docs)
+
+    pipeline.append({"$facet": {
+        "total": [{"$count": "count"}],
+        "docs": page_stages
+    }})
+    facet = (await validators_collection.aggregate(pipeline).to_list(length=1))[0]
+    total = facet["total"][0]["count"] if facet["total"] else 0
+    return facet["docs"], total
+
+def pagination_meta(total_count, batch, batch_size):
+    return {
+        "total": total_count,
+        "batch_size": batch_size if batch is not None else None,
+        "current_batch": batch if batch is not None else None,
+        "total_batches": (total_count + batch_size - 1) // batch_size if batch is not None else None
+    }
+
 # --- SERVEUR FASTAPI POUR EXPOSER LES DONNÉES ---
 
-app = FastAPI(title="Bittensor Validators API", 
+app = FastAPI(title="Bittensor Validators API",
               description="API to retrieve Bittensor validator data with sorting options",
-              version="1.0.0")
+              version="1.0.0",
+              # orjson serializes the large validator payloads several times
+              # faster than stdlib json
+              default_response_class=ORJSONResponse)
 
 # Autoriser toutes les origines (pour test local)
 app.add_middleware(
@@ -204,7 +391,7 @@ app.add_middleware(
 # --- STANDARD API ENDPOINTS ---
 
 @app.get("/api/validators")
-def get_validators(
+async def get_validators(
     sort_by: str = "total_stake",
     sort_order: str = "desc",
     subnet_id: Optional[int] = None,
@@ -223,94 +410,83 @@ def get_validators(
         batch: Batch number (0-based) to retrieve
         batch_size: Size of each batch (default: 32)
     """
-    # Récupère tous les documents sans le champ "_id"
-    docs = list(validators_collection.find({}, {"_id": 0}))
-    
-    # Calculate total stake for each validator and add it as a field
-    for doc in docs:
-        doc["total_stake"] = calculate_total_stake(doc)
-        
-        # If a subnet_id is specified, add the specific subnet stake for sorting
-        if subnet_id is not None:
-            doc["subnet_stake"] = get_subnet_stake(doc, subnet_id)
-    
-    # Sort the validators
-    if sort_by == "total_stake":
-        docs.sort(key=lambda x: x.get("total_stake", 0), reverse=(sort_order.lower() == "desc"))
-    elif sort_by == "subnet_stake" and subnet_id is not None:
-        docs.sort(key=lambda x: x.get("subnet_stake", 0), reverse=(sort_order.lower() == "desc"))
-    
-    # Filter by subnet if specified
+    # Unpaginated responses can span the whole collection: stream them one
+    # encoded document at a time instead of materializing a giant JSON blob
+    if batch is None and (limit is None or not isinstance(limit, int) or limit <= 0):
+        cursor = validators_collection.aggregate(
+            build_validators_pipeline(sort_by, sort_order, subnet_id)
+        )
+
+        async def stream_validators():
+            yield b'{"data":['
+            count = 0
+            async for doc in cursor:
+                chunk = orjson.dumps(format_validator_entry(doc))
+                yield b"," + chunk if count else chunk
+                count += 1
+            meta = pagination_meta(count, batch, batch_size)
+            yield b'],"pagination":' + orjson.dumps(meta) + b"}"
+
+        return StreamingResponse(stream_validators(), media_type="application/json")
+
+    return await build_validators_page(sort_by, sort_order, subnet_id, limit, batch, batch_size)
+
+def build_validators_pipeline(sort_by, sort_order, subnet_id):
+    """Pipeline computing total_stake, filtering and sorting server-side."""
+    direction = -1 if sort_order.lower() == "desc" else 1
+    pipeline = []
+
+    # Sort on the raw stored field before any $project/$addFields so the
+    # descending total_stake index can drive the sort instead of an
+    # in-memory one. Documents from before the write-time backfill sort
+    # as missing until the next sweep migrates them; their displayed
+    # value still falls back to summing subnetsData below.
+    if not (sort_by == "subnet_stake" and subnet_id is not None):
+        pipeline.append({"$sort": {"total_stake": direction}})
+
+    pipeline += [
+        {"$project": VALIDATOR_PROJECTION},
+        {"$addFields": {"total_stake": {"$ifNull": [
+            "$total_stake", stake_sum_expr("latestStake")
+        ]}}},
+    ]
+
     if subnet_id is not None:
-        docs = [doc for doc in docs if get_subnet_stake(doc, subnet_id) > 0]
-    
-    # Get total count before pagination
-    total_count = len(docs)
-    
-    # Apply batching if specified
-    if batch is not None and isinstance(batch, int) and batch >= 0:
-        start_idx = batch * batch_size
-        end_idx = start_idx + batch_size
-        docs = docs[start_idx:end_idx]
-    # Otherwise apply limit if specified
-    elif limit is not None and isinstance(limit, int) and limit > 0:
-        docs = docs[:limit]
+        pipeline.append({"$addFields": {"subnet_stake": {"$convert": {
+            "input": f"$subnetsData.{subnet_id}.latestStake", "to": "long",
+            "onError": 0, "onNull": 0}}}})
+        pipeline.append({"$match": {"subnet_stake": {"$gt": 0}}})
+
+    # subnet_stake is computed above, so that sort cannot use an index
+    if sort_by == "subnet_stake" and subnet_id is not None:
+        pipeline.append({"$sort": {"subnet_stake": direction}})
+    return pipeline
+
+def format_validator_entry(doc):
+    """Full formatted entry for the /api/validators listing."""
+    formatted_doc = format_validator_base(doc)
+    formatted_doc["total_stake"] = doc.get("total_stake", 0)
+    # Aggregated metrics as top-level fields
+    formatted_doc.update(cached_aggregate_subnet_data(doc))
+    formatted_doc["subnetsData"] = doc.get("subnetsData", {})
+    return formatted_doc
+
+async def build_validators_page(sort_by, sort_order, subnet_id, limit, batch, batch_size):
+    """Paginated validator listing as a plain dict (cached per query)."""
+    cache_key = ("validators", sort_by, sort_order, subnet_id, limit, batch, batch_size)
+    cached = response_cache_get(cache_key)
+    if cached is not None:
+        return cached
+
+    pipeline = build_validators_pipeline(sort_by, sort_order, subnet_id)
+    docs, total_count = await run_listing_pipeline(pipeline, batch, batch_size, limit)
 
-    formatted_docs = []
-    for doc in docs:
-        # Only include validators with at least one subnet if filtering by subnet
-        if subnet_id is not None and doc.get("subnet_stake", 0) == 0:
-            continue
-        
-        # Calculate aggregated metrics
-        aggregated_data = aggregate_subnet_data(doc)
-            
-        formatted_doc = {
-            "id": doc.get("id"),
-            "hotkey": doc.get("hotkey"),
-            "coldkey": doc.get("coldkey", ""),
-            "take": doc.get("take", "0.0"),
-            "verified": doc.get("verified", False),
-            "name": doc.get("name", f"Validator {doc.get('hotkey', '')[:8]}"),
-            "logo": doc.get("logo"),
-            "url": doc.get("url"),
-            "description": doc.get("description", "Validator on Bittensor network"),
-            "verifiedBadge": doc.get("verifiedBadge", False),
-            "twitter": doc.get("twitter"),
-            "total_stake": doc.get("total_stake", 0),
-            "last_updated": doc.get("last_updated"),
-            
-            # Add aggregated metrics as top-level fields
-            "latestStake": aggregated_data["latestStake"],
-            "stake1hAgo": aggregated_data["stake1hAgo"],
-            "stake24hAgo": aggregated_data["stake24hAgo"],
-            "stake7dAgo": aggregated_data["stake7dAgo"],
-            "stake30dAgo": aggregated_data["stake30dAgo"],
-            "hourlyYield": aggregated_data["hourlyYield"],
-            "dailyYield": aggregated_data["dailyYield"],
-            "weeklyYield": aggregated_data["weeklyYield"],
-            "monthlyYield": aggregated_data["monthlyYield"],
-            "hourlyApy": aggregated_data["hourlyApy"],
-            "dailyApy": aggregated_data["dailyApy"],
-            "weeklyApy": aggregated_data["weeklyApy"],
-            "monthlyApy": aggregated_data["monthlyApy"],
-
-            # Subnets
-            "subnetsData": doc.get("subnetsData", {})
-        }
-        formatted_docs.append(formatted_doc)
-    
-    # Add pagination metadata
     result = {
-        "data": formatted_docs,
-        "pagination": {
-            "total": total_count,
-            "batch_size": batch_size if batch is not None else None,
-            "current_batch": batch if batch is not None else None,
-            "total_batches": (total_count + batch_size - 1) // batch_size if batch is not None else None
-        }
+        "data": [format_validator_entry(doc) for doc in docs],
+        "pagination": pagination_meta(total_count, batch, batch_size)
     }
-    
+
+    response_cache_put(cache_key, result)
     return result
 
 
@@ -319,7 +495,13 @@ async def pull_subnets():
     try:
         node_url = os.getenv("NODE_URL")
         async with AsyncSubtensor(node_url) as subtensor:
-            subnets_data = await asyncio.wait_for(subtensor.get_subnets(), timeout=30)
+            # Single batched RPC: all_subnets() returns every subnet's info
+            # (name, symbol, ...) in one round-trip instead of one call per netuid.
+            try:
+                subnets_data = await asyncio.wait_for(subtensor.all_subnets(), timeout=30)
+            except Exception as e:
+                print(f"⚠️ all_subnets() failed ({e}), falling back to get_subnets()")
+                subnets_data = await asyncio.wait_for(subtensor.get_subnets(), timeout=30)
 
             result = []
             for subnet in subnets_data:
@@ -332,10 +514,11 @@ async def pull_subnets():
                         "last_updated": datetime.now().isoformat()
                     })
                 else:
+                    name = getattr(subnet, "subnet_name", None) or getattr(subnet, "name", None)
                     result.append({
                         "netuid": str(subnet.netuid),
-                        "name": getattr(subnet, "name", f"Subnet {subnet.netuid}"),
-                        "symbol": getattr(subnet, "symbol", f"NET{subnet.netuid}"),
+                        "name": name or f"Subnet {subnet.netuid}",
+                        "symbol": getattr(subnet, "symbol", None) or f"NET{subnet.netuid}",
                         "last_updated": datetime.now().isoformat()
                     })
 
@@ -345,44 +528,68 @@ async def pull_subnets():
         print(f"❌ Failed to fetch subnets from subtensor: {e}")
         return []
 
+# TTL cache for /api/subnets: (expiry from time.monotonic(), data).
+# The lock makes one request refresh the cache while concurrent ones wait,
+# instead of every request re-hitting the chain when the entry expires.
+SUBNETS_CACHE_TTL = 300.0
+_subnets_cache = (0.0, None)
+_subnets_cache_lock = asyncio.Lock()
+
 @app.get("/api/subnets")
 async def get_subnets():
     """Get all subnets with their names and symbols."""
-    return await pull_subnets()
-    # Sample subnet data if not in DB yet
-    default_subnets = {
-        "0": {"name": "Foundational Subnet", "symbol": "ROOT"},
-        "1": {"name": "Machine Learning Subnet", "symbol": "ML"},
-        "2": {"name": "Text Prompting Subnet", "symbol": "TXT"},
-        "3": {"name": "Miner Subnet", "symbol": "MINE"},
-        "4": {"name": "Voice Subnet", "symbol": "VOICE"}
-    }
-    
-    # Try to get from DB, fall back to defaults
-    subnet_docs = list(subnets_collection.find({}, {"_id": 0}))
-    
-    if not subnet_docs:
-        # If DB is empty, use defaults and potentially store them
-        for subnet_id, subnet_data in default_subnets.items():
-            subnets_collection.update_one(
-                {"netuid": subnet_id},
-                {"$set": {
-                    "netuid": subnet_id,
-                    "name": subnet_data["name"],
-                    "symbol": subnet_data["symbol"],
-                    "last_updated": datetime.now().isoformat()
-                }},
-                upsert=True
-            )
-        subnet_docs = list(subnets_collection.find({}, {"_id": 0}))
-    
-    return subnet_docs
+    global _subnets_cache
+
+    expiry, data = _subnets_cache
+    if data is not None and time.monotonic() < expiry:
+        return data
+
+    async with _subnets_cache_lock:
+        # Re-check: another request may have refreshed while we waited
+        expiry, data = _subnets_cache
+        if data is not None and time.monotonic() < expiry:
+            return data
+
+        result = await pull_subnets()
+        if result:
+            _subnets_cache = (time.monotonic() + SUBNETS_CACHE_TTL, result)
+        elif data is not None:
+            # Refresh failed: keep serving the last good value
+            return data
+        return result
+
+async def refresh_subnets_loop():
+    """Refresh the subnets cache ahead of expiry so no request pays the chain RTT."""
+    global _subnets_cache
+    while True:
+        try:
+            result = await pull_subnets()
+            if result:
+                _subnets_cache = (time.monotonic() + SUBNETS_CACHE_TTL, result)
+        except Exception as e:
+            # Serve-stale-on-error: keep the previous cache entry
+            print(f"⚠️ Background subnets refresh failed: {e}")
+        # Refresh slightly before the TTL lapses so requests never see a miss
+        await asyncio.sleep(max(SUBNETS_CACHE_TTL - 30.0, 30.0))
+
+@app.on_event("shutdown")
+async def close_mongo_client():
+    client.close()
+
+@app.on_event("startup")
+async def start_background_refresh():
+    try:
+        await db.create_collection("subnets")
+        print("Created subnets collection")
+    except CollectionInvalid:
+        print("Using existing subnets collection")
+    asyncio.create_task(refresh_subnets_loop())
 
 @app.get("/api/validators/{hotkey}")
-def get_validator_by_hotkey(hotkey: str):
+async def get_validator_by_hotkey(hotkey: str):
     """Get a validator by its hotkey."""
     # Récupère un validateur spécifique par sa hotkey
-    doc = validators_collection.find_one({"hotkey": hotkey}, {"_id": 0})
+    doc = await validators_collection.find_one({"hotkey": hotkey}, {"_id": 0})
     
     if not doc:
         return JSONResponse(status_code=404, content={"error": "Validator not found"})
@@ -391,16 +598,20 @@ def get_validator_by_hotkey(hotkey: str):
     doc["total_stake"] = calculate_total_stake(doc)
     
     # Calculate aggregated metrics and add them to the response
-    aggregated_data = aggregate_subnet_data(doc)
+    aggregated_data = cached_aggregate_subnet_data(doc)
     
     for key, value in aggregated_data.items():
         if value is not None:
             doc[key] = value
-    
+
+    # Les timestamps sont stockés en millisecondes epoch; renvoyer de
+    # l'ISO comme les endpoints de listing
+    doc["last_updated"] = format_last_updated(doc.get("last_updated"))
+
     return doc
 
 @app.get("/api/validators/subnet/{subnet_id}")
-def get_validators_by_subnet(
+async def get_validators_by_subnet(
     subnet_id: int,
     sort_order: str = "desc",
     limit: Optional[int] = None,
@@ -408,87 +619,46 @@ def get_validators_by_subnet(
     batch_size: int = 32
 ):
     """Get validators active in a specific subnet."""
-    # Récupère tous les documents sans le champ "_id"
-    docs = list(validators_collection.find({}, {"_id": 0}))
-    
-    # Filter validators who have stake in this subnet and add subnet_stake for sorting
-    subnet_validators = []
-    for doc in docs:
-        subnet_stake = get_subnet_stake(doc, subnet_id)
-        if subnet_stake > 0:
-            doc["subnet_stake"] = subnet_stake
-            subnet_validators.append(doc)
-    
-    # Get total count before pagination
-    total_count = len(subnet_validators)
-    
-    # Sort by stake in this subnet
-    subnet_validators.sort(key=lambda x: x.get("subnet_stake", 0), 
-                          reverse=(sort_order.lower() == "desc"))
-    
-    # Apply batching if specified
-    if batch is not None and isinstance(batch, int) and batch >= 0:
-        start_idx = batch * batch_size
-        end_idx = start_idx + batch_size
-        subnet_validators = subnet_validators[start_idx:end_idx]
-    # Otherwise apply limit if specified
-    elif limit is not None and isinstance(limit, int) and limit > 0:
-        subnet_validators = subnet_validators[:limit]
-    
+    cache_key = ("subnet_validators", subnet_id, sort_order, limit, batch, batch_size)
+    cached = response_cache_get(cache_key)
+    if cached is not None:
+        return cached
+
+    # Filter, sort and paginate on the server so only the requested page of
+    # subnet members crosses the wire, mirroring the get_validators pipeline
+    pipeline = [
+        {"$project": VALIDATOR_PROJECTION},
+        {"$addFields": {"subnet_stake": {"$convert": {
+            "input": f"$subnetsData.{subnet_id}.latestStake", "to": "long",
+            "onError": 0, "onNull": 0}}}},
+        {"$match": {"subnet_stake": {"$gt": 0}}},
+        {"$sort": {"subnet_stake": -1 if sort_order.lower() == "desc" else 1}},
+    ]
+
+    subnet_validators, total_count = await run_listing_pipeline(pipeline, batch, batch_size, limit)
+
     formatted_docs = []
     for doc in subnet_validators:
         # Calculate aggregated metrics
-        aggregated_data = aggregate_subnet_data(doc)
+        aggregated_data = cached_aggregate_subnet_data(doc)
         
-        formatted_doc = {
-            "id": doc.get("id"),
-            "hotkey": doc.get("hotkey"),
-            "coldkey": doc.get("coldkey", ""),
-            "take": doc.get("take", "0.0"),
-            "verified": doc.get("verified", False),
-            "name": doc.get("name", f"Validator {doc.get('hotkey', '')[:8]}"),
-            "logo": doc.get("logo"),
-            "url": doc.get("url"),
-            "description": doc.get("description", "Validator on Bittensor network"),
-            "verifiedBadge": doc.get("verifiedBadge", False),
-            "twitter": doc.get("twitter"),
-            "subnet_stake": doc.get("subnet_stake", 0),
-            "last_updated": doc.get("last_updated"),
-            
-            # Add aggregated metrics
-            "latestStake": aggregated_data["latestStake"],
-            "stake1hAgo": aggregated_data["stake1hAgo"],
-            "stake24hAgo": aggregated_data["stake24hAgo"],
-            "stake7dAgo": aggregated_data["stake7dAgo"],
-            "stake30dAgo": aggregated_data["stake30dAgo"],
-            "hourlyYield": aggregated_data["hourlyYield"],
-            "dailyYield": aggregated_data["dailyYield"],
-            "weeklyYield": aggregated_data["weeklyYield"],
-            "monthlyYield": aggregated_data["monthlyYield"],
-            "hourlyApy": aggregated_data["hourlyApy"],
-            "dailyApy": aggregated_data["dailyApy"],
-            "weeklyApy": aggregated_data["weeklyApy"],
-            "monthlyApy": aggregated_data["monthlyApy"],
-            
-            # Include only the relevant subnet data
-            "subnet_data": doc.get("subnetsData", {}).get(str(subnet_id), {}),
-            
-            # Include the full subnetsData
-            "subnetsData": doc.get("subnetsData", {})
-        }
+        formatted_doc = format_validator_base(doc)
+        formatted_doc["subnet_stake"] = doc.get("subnet_stake", 0)
+        # Aggregated metrics as top-level fields
+        formatted_doc.update(aggregated_data)
+        # Only the relevant subnet's data, plus the full subnetsData
+        subnets_data = doc.get("subnetsData", {})
+        formatted_doc["subnet_data"] = subnets_data.get(str(subnet_id), {})
+        formatted_doc["subnetsData"] = subnets_data
         formatted_docs.append(formatted_doc)
     
     # Add pagination metadata
     result = {
         "data": formatted_docs,
-        "pagination": {
-            "total": total_count,
-            "batch_size": batch_size if batch is not None else None,
-            "current_batch": batch if batch is not None else None,
-            "total_batches": (total_count + batch_size - 1) // batch_size if batch is not None else None
-        }
+        "pagination": pagination_meta(total_count, batch, batch_size)
     }
-    
+
+    response_cache_put(cache_key, result)
     return result
 
 # --- TRPC-COMPATIBLE BATCH ENDPOINT ---
@@ -515,36 +685,31 @@ async def trpc_batch_endpoint(
     if request.method == "GET":
         input_raw = request.query_params.get("input", "{}")
         try:
-            input_data = json.loads(input_raw)
-        except json.JSONDecodeError:
+            input_data = orjson.loads(input_raw)
+        except orjson.JSONDecodeError:
             input_data = {}
     else:
+        # orjson parses the raw bytes directly, skipping the UTF-8 decode pass
         body_bytes = await request.body()
         try:
-            input_data = json.loads(body_bytes.decode())
+            input_data = orjson.loads(body_bytes)
         except Exception:
             input_data = {}
 
-    # Load validator metadata
-    metadata_path = os.path.join("data", "validator_metadata.json")
-    if os.path.exists(metadata_path):
-        with open(metadata_path, "r") as f:
-            validator_metadata = json.load(f)
-    else:
-        validator_metadata = {}
+    # Load validator metadata (cached against the file's mtime)
+    validator_metadata = load_validator_metadata()
 
     # Debug: Check database content
-    docs = list(validators_collection.find({}, {"_id": 0}))
-    print(f"Found {len(docs)} validators in database")
-
-    response_data = []
+    validator_count = await validators_collection.count_documents({})
+    print(f"Found {validator_count} validators in database")
 
-    for i, proc in enumerate(procedure_list):
+    async def run_procedure(proc):
         if proc == "delegates.getDelegates4":
-            # Use the function directly from the current module
-            result = get_validators(
+            result = await build_validators_page(
                 sort_by="total_stake",
                 sort_order="desc",
+                subnet_id=None,
+                limit=None,
                 batch=batch,
                 batch_size=batch_size
             )
@@ -552,46 +717,63 @@ async def trpc_batch_endpoint(
             # Debug output for troubleshooting
             print(f"Retrieved {len(result['data'])} validators for batch {batch}")
 
+            # The page may come straight from the response cache, so build
+            # fresh entry dicts instead of mutating the cached objects
+            entries = []
             for idx, item in enumerate(result["data"]):
-                meta = validator_metadata.get(item["hotkey"], {})
+                entry = dict(item)
+                meta = validator_metadata.get(entry["hotkey"], {})
                 for key in ["id", "name", "logo", "url", "description", "twitter", "verified", "verifiedBadge"]:
                     if key in meta:
-                        item[key] = meta[key]
-                item.setdefault("id", idx)
+                        entry[key] = meta[key]
+                entry.setdefault("id", idx)
 
                 # Remove empty subnets
-                item["subnetsData"] = {k: v for k, v in item.get("subnetsData", {}).items() if v}
+                entry["subnetsData"] = {k: v for k, v in entry.get("subnetsData", {}).items() if v}
+                entries.append(entry)
 
-            response_data.append({
+            return {
                 "result": {
                     "data": {
-                        "json": result["data"]
+                        "json": entries
                     }
                 }
-            })
+            }
 
         elif proc == "subnets.getSubnetsNameAndSymbol":
             # Use the function directly from the current module
-            result = get_subnets()
-            response_data.append({
+            result = await get_subnets()
+            return {
                 "result": {
                     "data": {
                         "json": result
                     }
                 }
-            })
+            }
         else:
-            response_data.append({
+            return {
                 "error": {
                     "message": f"Unknown procedure: {proc}"
                 }
-            })
+            }
 
-    return response_data
+    # Dispatch all procedures concurrently, then stream each one out as soon
+    # as it (and its predecessors, to keep tRPC array order) completes —
+    # the full response array is never materialized in memory
+    tasks = [asyncio.create_task(run_procedure(proc)) for proc in procedure_list]
+
+    async def stream_results():
+        yield b"["
+        for i, task in enumerate(tasks):
+            chunk = orjson.dumps(await task)
+            yield b"," + chunk if i else chunk
+        yield b"]"
+
+    return StreamingResponse(stream_results(), media_type="application/json")
 # --- HELPER ENDPOINT TO UPDATE SUBNET METADATA ---
 
 @app.post("/api/admin/update-subnet")
-def update_subnet_metadata(
+async def update_subnet_metadata(
     netuid: int, 
     name: str, 
     symbol: str,
@@ -602,7 +784,7 @@ def update_subnet_metadata(
     if admin_key != os.getenv("ADMIN_KEY", "your_secure_admin_key"):
         return JSONResponse(status_code=401, content={"error": "Unauthorized"})
     
-    subnets_collection.update_one(
+    await subnets_collection.update_one(
         {"netuid": str(netuid)},
         {"$set": {
             "netuid": str(netuid),
@@ -622,9 +804,22 @@ def health_check():
 # --- LANCEMENT ---
 
 def start_api():
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # uvloop + httptools replace the default selector loop and h11 parser
+    # with much faster C implementations; one worker per core lets the
+    # JSON-heavy endpoints use the whole machine. The app is passed as an
+    # import string because uvicorn requires it to fork workers.
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop",
+        http="httptools",
+        workers=max(2, os.cpu_count() or 1),
+        log_level="warning"
+    )
 
 if __name__ == "__main__":
-    threading.Thread(target=run_metadata_updater, daemon=True).start()
-    threading.Thread(target=run_apy_updater, daemon=True).start()
+    # One updater thread in the supervising process (uvicorn workers import
+    # main:app and never reach this block, so sweeps run exactly once)
+    threading.Thread(target=run_updaters, daemon=True).start()
     start_api()
\ No newline at end of file
@@ -1,7 +1,11 @@
 import json
 import os
+import atexit
 import logging
-import bittensor as bt
+import functools
+import mmap
+import orjson
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, Optional
 
 # Configuration des logs
@@ -14,14 +18,28 @@ logger = logging.getLogger(__name__)
 
 # Chemin du fichier de métadonnées local
 METADATA_FILE = "data/validator_metadata.json"
+# Variante JSONL (une ligne par validateur): permet de retrouver une hotkey
+# par balayage d'octets sans matérialiser tout le dictionnaire
+METADATA_JSONL_FILE = "data/validator_metadata.jsonl"
 
+# Take par défaut d'un délégué sans valeur exposée
+DEFAULT_TAKE = "0.0000000000000000"
+
+@functools.lru_cache(maxsize=1)
 def init_subtensor():
     """
     Initialise la connexion au réseau Bittensor.
+    La connexion est mise en cache: les appels suivants réutilisent le même
+    websocket au lieu de refaire la poignée de main TLS à chaque fois.
     
     Returns:
         bt.subtensor: Instance de connexion au réseau Bittensor
     """
+    # Import paresseux: bittensor tire substrate-interface et cryptography
+    # (plusieurs secondes); les consommateurs qui ne font que lire les
+    # métadonnées locales n'en ont pas besoin
+    import bittensor as bt
+
     logger.info("Initialisation de la connexion au réseau Bittensor...")
     try:
         subtensor = bt.subtensor(network="finney")  # Pour le mainnet
@@ -31,29 +49,87 @@ def init_subtensor():
         logger.error(f"Erreur lors de la connexion au réseau Bittensor: {e}")
         raise
 
-# Cette fonction n'est plus nécessaire car nous utilisons get_delegate_identities()
-# Gardée pour référence au cas où
-def extract_identity_info(delegate) -> Dict[str, Any]:
+def close_subtensor():
+    """Ferme la connexion partagée si elle a été ouverte."""
+    if init_subtensor.cache_info().currsize:
+        try:
+            init_subtensor().close()
+        except Exception as e:
+            logger.warning(f"Erreur lors de la fermeture de la connexion: {e}")
+
+atexit.register(close_subtensor)
+
+@functools.lru_cache(maxsize=256)
+def _fmt_take(take: float) -> str:
+    """
+    Formate un take en chaîne à 16 décimales.
+    Mémoïsé: la plupart des délégués partagent les mêmes valeurs (0.18 par
+    défaut), donc on alloue K chaînes distinctes au lieu de N.
     """
-    DÉPRÉCIÉ: Cette méthode n'est plus utilisée car nous utilisons get_delegate_identities().
+    return f"{take:.16f}"
+
+def _build_entry(delegate, identities) -> Optional[Dict[str, Any]]:
+    """
+    Construit l'entrée de métadonnées d'un délégué, ou None si invalide.
     
     Args:
         delegate: Objet délégué de Bittensor
+        identities: Dictionnaire coldkey → identité
         
     Returns:
-        Dict[str, Any]: Dictionnaire contenant les informations d'identité
+        Optional[Dict[str, Any]]: Entrée de métadonnées du délégué
     """
-    identity_info = {
-        "name": None,
+    # Validation explicite en amont plutôt qu'un try/except par délégué:
+    # évite le coût d'installation d'exception à chaque itération et
+    # rend les entrées invalides visibles dans les logs
+    hotkey = getattr(delegate, 'hotkey_ss58', None)
+    coldkey = getattr(delegate, 'owner_ss58', None)
+    if not hotkey or not coldkey:
+        logger.error(f"Délégué invalide ignoré (hotkey={hotkey}, coldkey={coldkey})")
+        return None
+
+    # getattr avec défaut au lieu de hasattr + accès: hasattr refait le
+    # même getattr en interne, donc chaque paire doublait le coût de
+    # résolution
+    take = getattr(delegate, 'take', None)
+
+    # Récupérer l'identité du délégué à partir de la coldkey et calculer
+    # tous les champs dans des locales avant la construction
+    name = url = logo = twitter = None
+    identity = identities.get(coldkey)
+    if identity:
+        logger.info(f"Identité trouvée pour {coldkey}: {identity}")
+
+        display = getattr(identity, 'display', None)
+        if display:
+            name = str(display)
+
+        web = getattr(identity, 'web', None)
+        if web:
+            url = str(web)
+
+        image = getattr(identity, 'image', None)
+        if image:
+            logo = str(image)
+
+        identity_twitter = getattr(identity, 'twitter', None)
+        if identity_twitter:
+            twitter = str(identity_twitter)
+
+    # Littéral unique construit en C à taille connue: aucune mutation
+    # __setitem__ après coup
+    return {
+        "hotkey": hotkey,
+        "coldkey": coldkey,
+        "take": _fmt_take(float(take)) if take is not None else DEFAULT_TAKE,
+        "verified": False,
+        "name": name,
+        "logo": logo,
+        "url": url,
         "description": None,
-        "url": None,
-        "image": None,
-        "twitter": None
+        "verifiedBadge": False,
+        "twitter": twitter
     }
-    
-    logger.warning("La fonction extract_identity_info est déprécié. Utiliser get_delegate_identities() à la place.")
-    
-    return identity_info
 
 def fetch_metadata() -> Dict[str, Dict[str, Any]]:
     """
@@ -77,60 +153,16 @@ def fetch_metadata() -> Dict[str, Dict[str, Any]]:
         identities = subtensor.get_delegate_identities()
         logger.info(f"Récupération de {len(identities)} identités de délégués")
         
-        metadata = {}
-        
-        for delegate in delegates:
-            try:
-                # Obtenir les informations de base du délégué
-                hotkey = delegate.hotkey_ss58
-                coldkey = delegate.owner_ss58
-                
-                # Structure standard avec valeurs nulles par défaut
-                delegate_obj = {
-                    "hotkey": hotkey,
-                    "coldkey": coldkey,
-                    "take": "0.0000000000000000",
-                    "verified": False,
-                    "name": None,
-                    "logo": None,
-                    "url": None,
-                    "description": None,
-                    "verifiedBadge": False,
-                    "twitter": None
-                }
-                
-                # Ajouter le take s'il est disponible
-                if hasattr(delegate, 'take'):
-                    take = float(delegate.take)
-                    delegate_obj["take"] = f"{take:.16f}"
-                
-                # Récupérer l'identité du délégué à partir de la coldkey
-                identity = identities.get(coldkey)
-                if identity:
-                    logger.info(f"Identité trouvée pour {coldkey}: {identity}")
-                    
-                    # Mettre à jour avec les données réelles si disponibles
-                    if hasattr(identity, 'display') and identity.display:
-                        delegate_obj["name"] = str(identity.display)
-                    
-                    if hasattr(identity, 'web') and identity.web:
-                        delegate_obj["url"] = str(identity.web)
-                    
-                    if hasattr(identity, 'image') and identity.image:
-                        delegate_obj["logo"] = str(identity.image)
-                    
-                    if hasattr(identity, 'twitter') and identity.twitter:
-                        delegate_obj["twitter"] = str(identity.twitter)
-                        
-                    # Vérifier si d'autres attributs sont disponibles
-                    # On peut ajouter d'autres champs standard ici si nécessaire
-                
-                # Ajouter le délégué au dictionnaire
-                metadata[hotkey] = delegate_obj
-                
-            except Exception as delegate_error:
-                logger.error(f"Erreur lors du traitement du délégué {getattr(delegate, 'hotkey_ss58', 'unknown')}: {delegate_error}")
-        
+        # Transformation par délégué parallélisée: les accès aux attributs
+        # des objets pyo3 relâchent le GIL par intermittence, donc les
+        # threads se recouvrent sur la frontière Python/Rust
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            entries = list(executor.map(
+                lambda delegate: _build_entry(delegate, identities), delegates
+            ))
+
+        metadata = {entry["hotkey"]: entry for entry in entries if entry}
+
         logger.info(f"Récupération réussie: {len(metadata)} validateurs trouvés")
         return metadata
     except Exception as e:
@@ -151,33 +183,106 @@ def save_metadata(metadata: Dict[str, Dict[str, Any]]) -> bool:
         # Créer le répertoire si nécessaire
         os.makedirs(os.path.dirname(METADATA_FILE), exist_ok=True)
         
-        with open(METADATA_FILE, 'w') as f:
-            json.dump(metadata, f, indent=2)
+        # Écriture atomique: fichier temporaire puis os.replace (échange
+        # d'inode), un lecteur concurrent ne voit jamais de fichier tronqué
+        tmp_file = METADATA_FILE + ".tmp"
+        # orjson encode plusieurs fois plus vite que le json standard
+        with open(tmp_file, 'wb') as f:
+            f.write(orjson.dumps(metadata, option=orjson.OPT_INDENT_2))
+        os.replace(tmp_file, METADATA_FILE)
         
         logger.info(f"Métadonnées sauvegardées dans {METADATA_FILE}: {len(metadata)} validateurs")
+        # Invalider le cache mémoire: la prochaine lecture reparsera le fichier
+        _metadata_cache["mtime"] = None
         return True
-    except (IOError, json.JSONDecodeError) as e:
+    except (OSError, orjson.JSONEncodeError) as e:
         logger.error(f"Erreur lors de la sauvegarde des métadonnées: {e}")
         return False
 
+# Cache mémoire des métadonnées, invalidé par le mtime du fichier: le
+# fichier ne change qu'à la synchronisation, donc les lectures répétées
+# se réduisent à un os.stat + un accès dict
+_metadata_cache = {"mtime": None, "data": None}
+
+def save_metadata_jsonl(metadata: Dict[str, Dict[str, Any]]) -> bool:
+    """
+    Sauvegarde les métadonnées au format JSONL, une ligne par validateur.
+    
+    Args:
+        metadata: Dictionnaire des métadonnées des validateurs
+        
+    Returns:
+        bool: True si la sauvegarde a réussi, False sinon
+    """
+    try:
+        os.makedirs(os.path.dirname(METADATA_JSONL_FILE), exist_ok=True)
+        
+        tmp_file = METADATA_JSONL_FILE + ".tmp"
+        with open(tmp_file, 'wb') as f:
+            for entry in metadata.values():
+                f.write(orjson.dumps(entry, option=orjson.OPT_APPEND_NEWLINE))
+        os.replace(tmp_file, METADATA_JSONL_FILE)
+        return True
+    except (OSError, orjson.JSONEncodeError) as e:
+        logger.error(f"Erreur lors de la sauvegarde JSONL: {e}")
+        return False
+
+def load_validator_jsonl(hotkey: str) -> Optional[Dict[str, Any]]:
+    """
+    Recherche un validateur dans le fichier JSONL par sa hotkey.
+    Le fichier est mappé en mémoire et balayé en octets: seule la ligne
+    du validateur demandé est parsée, sans charger la structure complète.
+    
+    Args:
+        hotkey: Hotkey du validateur
+        
+    Returns:
+        Optional[Dict[str, Any]]: Métadonnées du validateur ou None
+    """
+    try:
+        with open(METADATA_JSONL_FILE, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                pos = mm.find(b'"hotkey":"' + hotkey.encode() + b'"')
+                if pos == -1:
+                    return None
+                start = mm.rfind(b"\n", 0, pos) + 1
+                end = mm.find(b"\n", pos)
+                if end == -1:
+                    end = mm.size()
+                return orjson.loads(mm[start:end])
+    except (OSError, ValueError, orjson.JSONDecodeError) as e:
+        logger.error(f"Erreur lors de la lecture JSONL: {e}")
+        return None
+
 def load_metadata() -> Optional[Dict[str, Dict[str, Any]]]:
     """
     Charge les métadonnées depuis le fichier local.
+    Ne relit et reparse le fichier que si son mtime a changé.
     
     Returns:
         Optional[Dict[str, Dict[str, Any]]]: Dictionnaire des métadonnées des validateurs ou None en cas d'erreur
     """
-    if not os.path.exists(METADATA_FILE):
+    try:
+        mtime = os.stat(METADATA_FILE).st_mtime_ns
+    except OSError:
         logger.warning(f"Fichier de métadonnées {METADATA_FILE} introuvable")
         return None
-    
+
+    if _metadata_cache["mtime"] == mtime:
+        return _metadata_cache["data"]
+
     try:
-        with open(METADATA_FILE, 'r') as f:
-            metadata = json.load(f)
+        # mmap + orjson: le parseur lit directement le cache de pages du
+        # noyau, sans copie intermédiaire du fichier entier sur le tas
+        with open(METADATA_FILE, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                metadata = orjson.loads(memoryview(mm))
         
         logger.info(f"Métadonnées chargées depuis {METADATA_FILE}: {len(metadata)} validateurs")
+        _metadata_cache["mtime"] = mtime
+        _metadata_cache["data"] = metadata
         return metadata
-    except (IOError, json.JSONDecodeError) as e:
+    except (OSError, ValueError) as e:
         logger.error(f"Erreur lors du chargement des métadonnées: {e}")
         return None
 
@@ -213,8 +318,11 @@ def sync_metadata() -> bool:
         # Récupérer les métadonnées
         metadata = fetch_metadata()
         
-        # Sauvegarder les métadonnées
+        # Sauvegarder les métadonnées (plus la variante JSONL pour les
+        # lecteurs qui ne veulent qu'une hotkey)
         success = save_metadata(metadata)
+        if success:
+            save_metadata_jsonl(metadata)
         
         logger.info("Synchronisation des métadonnées terminée")
         return success
@@ -222,50 +330,64 @@ def sync_metadata() -> bool:
         logger.error(f"Erreur lors de la synchronisation des métadonnées: {e}")
         return False
 
+def instance_attrs(obj) -> Dict[str, Any]:
+    """
+    Retourne uniquement les attributs d'instance publics d'un objet.
+    Contrairement à dir(), vars() ne parcourt pas les méthodes ni les
+    attributs hérités, ce qui évite un getattr() par entrée.
+
+    Args:
+        obj: Objet à inspecter
+
+    Returns:
+        Dict[str, Any]: Attributs d'instance publics de l'objet
+    """
+    try:
+        attrs = vars(obj)
+    except TypeError:
+        # Objets avec __slots__: pas de __dict__, on retombe sur les slots
+        attrs = {slot: getattr(obj, slot, None) for slot in getattr(obj, '__slots__', ())}
+
+    return {k: v for k, v in attrs.items() if not k.startswith('_')}
+
 def inspect_system_structure():
     """
     Fonction de débogage pour inspecter la structure des objets delegate et des identités
     """
     try:
         subtensor = init_subtensor()
-        
+
         # Inspecter les délégués
         delegates = subtensor.get_delegates()
         if delegates:
             sample_delegate = delegates[0]
-            logger.info(f"Structure d'un delegate: {dir(sample_delegate)}")
-            
-            # Afficher les attributs et méthodes disponibles d'un délégué
-            for attr in dir(sample_delegate):
-                if not attr.startswith('_'):  # Ignorer les attributs privés
-                    try:
-                        value = getattr(sample_delegate, attr)
-                        logger.info(f"Attribut delegate.{attr}: {type(value)} - {value}")
-                    except Exception as e:
-                        logger.info(f"Impossible d'accéder à l'attribut delegate.{attr}: {e}")
-        
+            delegate_attrs = instance_attrs(sample_delegate)
+            logger.info(f"Structure d'un delegate: {list(delegate_attrs)}")
+
+            # Afficher les attributs d'instance d'un délégué
+            for attr, value in delegate_attrs.items():
+                logger.info(f"Attribut delegate.{attr}: {type(value)} - {value}")
+
         # Inspecter les identités
         identities = subtensor.get_delegate_identities()
         if identities:
             sample_key = next(iter(identities))
             sample_identity = identities[sample_key]
-            logger.info(f"Structure d'une identité: {dir(sample_identity)}")
-            
-            # Afficher les attributs et méthodes disponibles d'une identité
-            for attr in dir(sample_identity):
-                if not attr.startswith('_'):  # Ignorer les attributs privés
-                    try:
-                        value = getattr(sample_identity, attr)
-                        logger.info(f"Attribut identity.{attr}: {type(value)} - {value}")
-                    except Exception as e:
-                        logger.info(f"Impossible d'accéder à l'attribut identity.{attr}: {e}")
-    
+            identity_attrs = instance_attrs(sample_identity)
+            logger.info(f"Structure d'une identité: {list(identity_attrs)}")
+
+            # Afficher les attributs d'instance d'une identité
+            for attr, value in identity_attrs.items():
+                logger.info(f"Attribut identity.{attr}: {type(value)} - {value}")
+
     except Exception as e:
         logger.error(f"Erreur lors de l'inspection de la structure: {e}")
 
 if __name__ == "__main__":
-    # Inspecter la structure du système pour le débogage
-    inspect_system_structure()
+    # Inspection de débogage uniquement sur demande: elle ouvre une seconde
+    # connexion au réseau et déclenche des dizaines d'appels RPC bloquants
+    if os.getenv("BT_DEBUG"):
+        inspect_system_structure()
     
     # Synchroniser les métadonnées
     sync_metadata()
@@ -273,12 +395,17 @@ if __name__ == "__main__":
     # Afficher un exemple de validateur
     metadata = load_metadata()
     if metadata:
-        # Trouver un validateur avec des métadonnées non vides si possible
-        sample_validators = [v for v in metadata.values() 
-                           if v.get('name') or v.get('url') or v.get('logo')]
+        # Une seule passe: repérer le premier validateur avec identité et
+        # compter en même temps, sans liste intermédiaire
+        sample_validator = None
+        validators_with_identity = 0
+        for v in metadata.values():
+            if v.get('name') or v.get('url') or v.get('logo'):
+                validators_with_identity += 1
+                if sample_validator is None:
+                    sample_validator = v
         
-        if sample_validators:
-            sample_validator = sample_validators[0]
+        if sample_validator is not None:
             print(f"Exemple de métadonnées pour un validateur avec identité:")
         else:
             sample_key = next(iter(metadata))
@@ -287,10 +414,6 @@ if __name__ == "__main__":
         
         print(json.dumps(sample_validator, indent=2))
         
-        # Compter les validateurs avec des métadonnées d'identité
-        validators_with_identity = sum(1 for v in metadata.values() 
-                                    if v.get('name') or v.get('url') or v.get('logo'))
-        
         print(f"\nNombre total de validateurs: {len(metadata)}")
         print(f"Nombre de validateurs avec identité: {validators_with_identity}")
     else:
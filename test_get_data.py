@@ -1,7 +1,7 @@
 import asyncio
 import json
 import time
-from datetime import datetime, timedelta
+from datetime import datetime
 from bittensor import AsyncSubtensor
 from rich.console import Console
 from rich.table import Table
@@ -18,42 +18,107 @@ TIME_PERIODS = {
     "30d": 30 * 24 * 60 * 60,  # 30 days in seconds
 }
 
-async def get_block_for_timestamp(subtensor, target_timestamp):
-    """Get the closest block number for a given timestamp."""
+# Static (period, yield key, apy key, seconds) table for the APY loop,
+# built once instead of per subnet
+_PERIOD_SPEC = [
+    (period, f"{name}Yield", f"{name}Apy", seconds)
+    for (period, seconds), name in zip(
+        TIME_PERIODS.items(), ("hourly", "daily", "weekly", "monthly")
+    )
+]
+
+# Probed (block height -> unix timestamp) pairs, shared between the
+# four time-period lookups so overlapping binary-search probes are free
+BLOCK_TS_CACHE = {}
+
+async def get_block_timestamp(subtensor, block):
+    """Get the unix timestamp of a block, memoized in BLOCK_TS_CACHE."""
+    if block in BLOCK_TS_CACHE:
+        return BLOCK_TS_CACHE[block]
+    
+    block_hash = await subtensor.get_block_hash(block)
+    result = await asyncio.wait_for(
+        subtensor.substrate.query(
+            module="Timestamp", storage_function="Now", block_hash=block_hash
+        ),
+        timeout=30
+    )
+    timestamp = int(getattr(result, "value", result)) // 1000  # ms -> s
+    BLOCK_TS_CACHE[block] = timestamp
+    return timestamp
+
+async def get_block_for_timestamp(subtensor, target_timestamp, margin=30 * 60):
+    """Get the closest block number for a given timestamp.
+    
+    Binary search over on-chain block timestamps, seeded by the 12s/block
+    heuristic. The fixed-rate estimate alone drifts by many blocks over a
+    30-day window; the search converges to within `margin` seconds.
+    """
     current_block = await asyncio.wait_for(subtensor.block, timeout=30)
     current_timestamp = int(time.time())
     
     # Estimate blocks per second (Bittensor produces roughly 1 block every 12 seconds)
     blocks_per_second = 1 / 12
     
-    # Calculate the approximate block number
+    # Seed the search bracket around the fixed-rate estimate
     time_diff = current_timestamp - target_timestamp
-    block_diff = int(time_diff * blocks_per_second)
+    estimate = max(1, current_block - int(time_diff * blocks_per_second))
+    lo = max(1, estimate - 2000)
+    hi = min(current_block, estimate + 2000)
     
-    return max(1, current_block - block_diff)
+    best_block, best_diff = estimate, None
+    while lo <= hi:
+        mid = (lo + hi) // 2
+        timestamp = await get_block_timestamp(subtensor, mid)
+        diff = timestamp - target_timestamp
+        
+        if best_diff is None or abs(diff) < best_diff:
+            best_block, best_diff = mid, abs(diff)
+        if abs(diff) < margin:
+            return mid
+        
+        if diff < 0:
+            lo = mid + 1
+        else:
+            hi = mid - 1
+    
+    return best_block
 
-async def get_stake(subtensor, hotkey, netuid, block):
-    """Get stake for a specific hotkey on a subnet at a given block."""
+async def get_stakes_at_block(subtensor, hotkey, netuids, block, block_hash):
+    """Get the hotkey's stake on many subnets at one block.
+
+    One query_multi envelope covers every subnet's TotalHotkeyAlpha
+    entry, so the whole sweep costs a single round-trip per block
+    instead of one RPC per (subnet, block) pair. The caller resolves
+    block_hash up front so the client never re-derives it per query.
+    """
     try:
-        # Get all neurons and filter by hotkey
-        neurons = await asyncio.wait_for(
-            subtensor.neurons(netuid, block=block),
+        storage_keys = await asyncio.gather(*(
+            subtensor.substrate.create_storage_key(
+                "SubtensorModule", "TotalHotkeyAlpha", [hotkey, netuid],
+                block_hash=block_hash
+            )
+            for netuid in netuids
+        ))
+        results = await asyncio.wait_for(
+            subtensor.substrate.query_multi(list(storage_keys), block_hash=block_hash),
             timeout=30  # 30 second timeout
         )
-        
-        for neuron in neurons:
-            if hasattr(neuron, 'hotkey') and neuron.hotkey == hotkey:
-                if neuron.stake:
-                    return int(getattr(neuron.stake, "rao", neuron.stake))
-        return None
+
+        stakes = {netuid: None for netuid in netuids}
+        for storage_key, value in results:
+            netuid = storage_key.params[1]
+            value = getattr(value, "value", value)
+            stakes[netuid] = int(value) if value else None
+        return stakes
     except asyncio.TimeoutError:
-        console.print(f"[yellow]Timeout retrieving neurons for subnet {netuid} at block {block}[/yellow]")
-        return None
+        console.print(f"[yellow]Timeout retrieving stakes at block {block}[/yellow]")
+        return {netuid: None for netuid in netuids}
     except Exception as e:
-        console.print(f"[red]Error getting stake for subnet {netuid} at block {block}: {e}[/red]")
-        return None
+        console.print(f"[red]Error getting stakes at block {block}: {e}[/red]")
+        return {netuid: None for netuid in netuids}
 
-async def calculate_apy(current_stake, past_stake, time_period_seconds):
+def calculate_apy(current_stake, past_stake, time_period_seconds):
     """Calculate APY based on current and past stake."""
     if not current_stake or not past_stake or past_stake == 0:
         return None
@@ -61,11 +126,8 @@ async def calculate_apy(current_stake, past_stake, time_period_seconds):
     # Calculate yield
     yield_amount = max(0, current_stake - past_stake)
     
-    # Convert time period to days
-    time_period_days = time_period_seconds / (24 * 60 * 60)
-    
-    # Calculate annualized yield
-    annual_yield = yield_amount * (365 / time_period_days)
+    # Annualize directly in seconds (the day conversions cancel out)
+    annual_yield = yield_amount * 365 * 86400 / time_period_seconds
     
     # Calculate APY
     apy = (annual_yield / past_stake) * 100
@@ -96,10 +158,15 @@ async def main():
             
             # Get historical blocks
             console.print("[bold blue]Calculating historical blocks...[/bold blue]")
-            historical_blocks = {}
+            # Resolve the four periods together; overlapping binary-search
+            # probes hit BLOCK_TS_CACHE instead of the node
+            period_blocks = await asyncio.gather(*(
+                get_block_for_timestamp(subtensor, current_timestamp - seconds)
+                for seconds in TIME_PERIODS.values()
+            ))
+            historical_blocks = dict(zip(TIME_PERIODS, period_blocks))
             for period, seconds in TIME_PERIODS.items():
                 historical_timestamp = current_timestamp - seconds
-                historical_blocks[period] = await get_block_for_timestamp(subtensor, historical_timestamp)
                 console.print(f"📅 Block {period} ago: {historical_blocks[period]} ({datetime.fromtimestamp(historical_timestamp)})")
             
             # Get subnet list with timeout
@@ -128,16 +195,35 @@ async def main():
             results = {}
             active_subnets = []
             
+            valid_subnets = []
             for netuid in target_subnets:
                 if netuid not in subnets:
                     console.print(f"[yellow]Subnet {netuid} not in subnet list, skipping...[/yellow]")
-                    continue
-                    
+                else:
+                    valid_subnets.append(netuid)
+            
+            # One batched storage read per block covers every subnet, and
+            # the five blocks are resolved concurrently: 5 RPCs total
+            periods = list(historical_blocks)
+            blocks = [current_block, *historical_blocks.values()]
+            # Resolve each height to its hash exactly once up front
+            block_hashes = await asyncio.gather(*(
+                subtensor.determine_block_hash(block) for block in blocks
+            ))
+            console.print(f"Fetching stakes for {len(valid_subnets)} subnets x {len(blocks)} blocks...")
+            per_block_stakes = await asyncio.gather(*(
+                get_stakes_at_block(subtensor, HOTKEY, valid_subnets, block, block_hash)
+                for block, block_hash in zip(blocks, block_hashes)
+            ))
+            stakes_by_subnet = {
+                netuid: [block_stakes[netuid] for block_stakes in per_block_stakes]
+                for netuid in valid_subnets
+            }
+            
+            for netuid in valid_subnets:
                 console.print(f"\n[bold]Processing subnet {netuid}...[/bold]")
                 
-                # Get current stake
-                console.print(f"Getting current stake for subnet {netuid}...")
-                current_stake = await get_stake(subtensor, HOTKEY, netuid, current_block)
+                current_stake = stakes_by_subnet[netuid][0]
                 
                 if current_stake and current_stake > 0:
                     console.print(f"[green]✅ Active stake found for subnet {netuid}: {current_stake}[/green]")
@@ -148,14 +234,10 @@ async def main():
                         "latestStake": str(current_stake),
                     }
                     
-                    # Get historical stakes
-                    historical_stakes = {}
-                    for period, historical_block in historical_blocks.items():
-                        console.print(f"Getting {period} ago stake for subnet {netuid} (block {historical_block})...")
-                        historical_stake = await get_stake(subtensor, HOTKEY, netuid, historical_block)
-                        stake_key = f"stake{period}Ago"
-                        historical_stakes[period] = historical_stake
-                        subnet_data[stake_key] = str(historical_stake) if historical_stake else None
+                    # Historical stakes, already fetched by the gather above
+                    historical_stakes = dict(zip(periods, stakes_by_subnet[netuid][1:]))
+                    for period, historical_stake in historical_stakes.items():
+                        subnet_data[f"stake{period}Ago"] = str(historical_stake) if historical_stake else None
                         
                         # Display the historical stake value explicitly
                         if historical_stake:
@@ -164,20 +246,13 @@ async def main():
                             console.print(f"[yellow]No stake data available for {period} ago[/yellow]")
                     
                     # Calculate yields and APYs
-                    time_periods = {
-                        "1h": {"key": "hourlyYield", "apy_key": "hourlyApy"},
-                        "24h": {"key": "dailyYield", "apy_key": "dailyApy"},
-                        "7d": {"key": "weeklyYield", "apy_key": "weeklyApy"},
-                        "30d": {"key": "monthlyYield", "apy_key": "monthlyApy"}
-                    }
-                    
-                    for period, info in time_periods.items():
+                    for period, yield_key, apy_key, seconds in _PERIOD_SPEC:
                         historical_stake = historical_stakes.get(period)
                         
                         if historical_stake:
                             # Calculate yield
                             yield_amount = max(0, current_stake - historical_stake)
-                            subnet_data[info["key"]] = str(yield_amount)
+                            subnet_data[yield_key] = str(yield_amount)
                             console.print(f"{period} yield: {yield_amount} ({format_stake(yield_amount)})")
                             
                             # Calculate relative yield percentage for the period
@@ -186,20 +261,20 @@ async def main():
                                 console.print(f"{period} relative yield: {relative_yield_pct:.2f}%")
                             
                             # Calculate APY
-                            apy = await calculate_apy(
+                            apy = calculate_apy(
                                 current_stake,
                                 historical_stake,
-                                TIME_PERIODS[period]
+                                seconds
                             )
                             
                             if apy is not None:
-                                subnet_data[info["apy_key"]] = f"{apy:.2f}"
+                                subnet_data[apy_key] = f"{apy:.2f}"
                                 console.print(f"{period} APY: {apy:.2f}%")
                             else:
-                                subnet_data[info["apy_key"]] = None
+                                subnet_data[apy_key] = None
                         else:
-                            subnet_data[info["key"]] = None
-                            subnet_data[info["apy_key"]] = None
+                            subnet_data[yield_key] = None
+                            subnet_data[apy_key] = None
                     
                     results[str(netuid)] = subnet_data
                     
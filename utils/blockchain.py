@@ -4,9 +4,12 @@ Blockchain utility functions for interacting with Bittensor network.
 """
 
 import logging
+import time
+from functools import lru_cache
+
 import bittensor as bt
 import numpy as np
-from typing import List, Dict, Optional, Any, Union
+from typing import List, Any
 
 # Setup logging
 logging.basicConfig(
@@ -33,6 +36,12 @@ SUBNET_NAMES = {
     13: "DNS"
 }
 
+class Validator:
+    """Lightweight validator handle exposing just the hotkey"""
+    
+    def __init__(self, hotkey):
+        self.hotkey = hotkey
+
 class BittensorBlockchain:
     """Class for interacting with the Bittensor blockchain"""
     
@@ -40,6 +49,12 @@ class BittensorBlockchain:
         """Initialize the blockchain connection"""
         self.network = network
         self.subtensor = None
+        self._connected = False
+        # TTL'd caches: netuid -> (fetched_at, value)
+        self._mg_cache = {}
+        self._hp_cache = {}
+        # hotkey -> uid maps, rebuilt whenever the metagraph refreshes
+        self._hotkey_idx = {}
         self.connect()
     
     def connect(self):
@@ -47,21 +62,53 @@ class BittensorBlockchain:
         try:
             # Direct initialization
             self.subtensor = bt.subtensor(network=self.network)
+            self._connected = True
             logger.info(f"Connected to Bittensor {self.network} network")
             return True
         except Exception as e:
+            self._connected = False
             logger.error(f"Failed to initialize subtensor: {str(e)}")
             return False
     
+    def _metagraph(self, netuid: int, ttl: int = 60):
+        """Get a (cached) lite metagraph for a subnet.
+
+        Back-to-back calls for the same subnet reuse one sync instead of
+        re-downloading the metagraph each time; lite=True skips the
+        weights/bonds tensors since callers only read S and hotkeys.
+        """
+        cached = self._mg_cache.get(netuid)
+        if cached and time.time() - cached[0] < ttl:
+            return cached[1]
+        
+        metagraph = bt.metagraph(netuid=netuid, network=self.network, lite=True)
+        self._mg_cache[netuid] = (time.time(), metagraph)
+        return metagraph
+    
+    def _hotkey_idx_for(self, netuid: int) -> dict:
+        """Map hotkey -> uid for a subnet.
+
+        Built once per cached metagraph, so repeated stake lookups are
+        dict hits instead of O(N) scans over metagraph.hotkeys.
+        """
+        metagraph = self._metagraph(netuid)
+        cached = self._hotkey_idx.get(netuid)
+        if cached and cached[0] is metagraph:
+            return cached[1]
+        
+        idx = {str(hk): i for i, hk in enumerate(metagraph.hotkeys)}
+        self._hotkey_idx[netuid] = (metagraph, idx)
+        return idx
+    
     def is_connected(self):
         """Check if connected to the blockchain"""
-        return self.subtensor is not None
+        return self._connected
     
     def reconnect(self):
         """Reconnect to the blockchain if disconnected"""
-        if not self.is_connected():
-            return self.connect()
-        return True
+        if self._connected:
+            return True
+        return self.connect()
     
     def get_subnet_netuids(self) -> List[int]:
         """Get all subnet netuids"""
@@ -86,7 +133,7 @@ class BittensorBlockchain:
             for netuid in known_subnets:
                 try:
                     # Check if subnet exists by trying to create a metagraph
-                    metagraph = bt.metagraph(netuid=netuid, network=self.network)
+                    metagraph = self._metagraph(netuid)
                     # If metagraph creation succeeds and has neurons, subnet exists
                     if hasattr(metagraph, 'hotkeys') and len(metagraph.hotkeys) > 0:
                         logger.info(f"Verified subnet {netuid} with {len(metagraph.hotkeys)} neurons")
@@ -106,24 +153,18 @@ class BittensorBlockchain:
     
     def get_subnet_validators(self, netuid: int) -> List:
         """Get validators for a subnet"""
-        self.reconnect()
-        
-        # Create a metagraph for this subnet
+        # Metagraph sync doesn't go through self.subtensor; no reconnect
         try:
-            metagraph = bt.metagraph(netuid=netuid, network=self.network)
+            metagraph = self._metagraph(netuid)
             
             # Check if this is a validator metagraph with stake info
             if hasattr(metagraph, 'S') and len(metagraph.S) > 0 and hasattr(metagraph, 'hotkeys'):
-                # Create validator objects from hotkeys with positive stake
-                validators = []
-                for i, stake in enumerate(metagraph.S):
-                    if stake > 0 and i < len(metagraph.hotkeys):
-                        # Create a simple validator object with hotkey
-                        class Validator:
-                            def __init__(self, hotkey):
-                                self.hotkey = hotkey
-                        
-                        validators.append(Validator(metagraph.hotkeys[i]))
+                # Vectorized filter: the positive-stake mask runs in C
+                # instead of one Python iteration per neuron
+                stakes = np.asarray(metagraph.S)
+                hotkeys = metagraph.hotkeys
+                idxs = np.flatnonzero(stakes > 0)
+                validators = [Validator(hotkeys[i]) for i in idxs.tolist() if i < len(hotkeys)]
                 
                 logger.info(f"Found {len(validators)} validators for subnet {netuid} using metagraph")
                 return validators
@@ -135,8 +176,6 @@ class BittensorBlockchain:
     
     def get_validator_stake(self, netuid: int, hotkey: str) -> int:
         """Get validator stake in a subnet"""
-        self.reconnect()
-        
         try:
             # Convert hotkey to string if needed
             if not isinstance(hotkey, str):
@@ -149,14 +188,8 @@ class BittensorBlockchain:
             
             # Try metagraph approach
             try:
-                metagraph = bt.metagraph(netuid=netuid, network=self.network)
-                uid = None
-                
-                # Find uid for this hotkey
-                for i, mh in enumerate(metagraph.hotkeys):
-                    if str(mh) == hotkey:
-                        uid = i
-                        break
+                metagraph = self._metagraph(netuid)
+                uid = self._hotkey_idx_for(netuid).get(hotkey)
                 
                 if uid is not None and uid < len(metagraph.S):
                     return int(metagraph.S[uid])
@@ -168,25 +201,31 @@ class BittensorBlockchain:
     
     def get_total_subnet_stake(self, netuid: int) -> int:
         """Get total stake in a subnet"""
-        self.reconnect()
-        
         try:
             # Try metagraph approach
-            metagraph = bt.metagraph(netuid=netuid, network=self.network)
+            metagraph = self._metagraph(netuid)
             if hasattr(metagraph, 'S'):
-                return int(sum(metagraph.S))
+                return int(np.asarray(metagraph.S, dtype=np.int64).sum())
         except Exception as e:
             logger.error(f"Error getting total stake for subnet {netuid}: {str(e)}")
         
         # Return default value
         return 0
     
-    def get_subnet_hyperparameters(self, netuid: int) -> Any:
+    def get_subnet_hyperparameters(self, netuid: int, ttl: int = 600) -> Any:
         """Get subnet hyperparameters"""
-        self.reconnect()
+        # Hyperparameters change rarely; serve from cache for ttl seconds
+        cached = self._hp_cache.get(netuid)
+        if cached and time.time() - cached[0] < ttl:
+            return cached[1]
         
         try:
-            return self.subtensor.get_subnet_hyperparameters(netuid)
+            hyperparams = self.subtensor.get_subnet_hyperparameters(netuid)
+            self._hp_cache[netuid] = (time.time(), hyperparams)
+            return hyperparams
+        except AttributeError:
+            if self.connect():
+                return self.get_subnet_hyperparameters(netuid, ttl)
         except Exception as e:
             logger.error(f"Error getting hyperparameters for subnet {netuid}: {str(e)}")
             
@@ -202,10 +241,13 @@ class BittensorBlockchain:
     
     def get_current_block(self) -> int:
         """Get current block number"""
-        self.reconnect()
-        
         try:
             return self.subtensor.get_current_block()
+        except AttributeError:
+            # Never connected; retry once after connecting
+            if self.connect():
+                return self.get_current_block()
+            return 0
         except Exception as e:
             logger.error(f"Error getting current block: {str(e)}")
             return 0
@@ -218,16 +260,25 @@ class BittensorBlockchain:
     
     def get_validator_owner(self, netuid: int, hotkey: str) -> str:
         """Get validator owner (coldkey)"""
-        self.reconnect()
-        
         try:
-            coldkey = self.subtensor.get_hotkey_owner(hotkey)
-            return str(coldkey) if coldkey else f"Unknown-{hotkey[-8:]}"
+            coldkey = _owner_of(hotkey, self.network)
+            return coldkey if coldkey else f"Unknown-{hotkey[-8:]}"
         except Exception as e:
             logger.error(f"Error getting owner for validator {hotkey}: {str(e)}")
         
         return f"Unknown-{hotkey[-8:]}"
 
+@lru_cache(maxsize=10_000)
+def _owner_of(hotkey: str, network: str) -> str:
+    """Resolve a hotkey's coldkey owner, memoized for the process.
+
+    Ownership never changes while the process runs, so each hotkey
+    costs one RPC ever. Exceptions propagate uncached, letting callers
+    retry transient failures.
+    """
+    coldkey = blockchain.subtensor.get_hotkey_owner(hotkey)
+    return str(coldkey) if coldkey else ""
+
 # Create a globally accessible instance
 blockchain = BittensorBlockchain()
 
@@ -3,13 +3,15 @@
 Cache utility functions for the Bittensor API.
 """
 
+import atexit
 import os
-import json
 import logging
-import threading
+import sqlite3
 import time
-from datetime import datetime
-from typing import Dict, Any, Optional
+import threading
+
+import orjson
+from typing import Dict, Any
 
 # Setup logging
 logging.basicConfig(
@@ -21,14 +23,33 @@ logger = logging.getLogger("cache")
 # Default paths
 DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
 VALIDATOR_METADATA_PATH = os.path.join(DEFAULT_DATA_DIR, "validator_metadata.json")
+VALIDATOR_METADATA_DB_PATH = os.path.join(DEFAULT_DATA_DIR, "validator_metadata.sqlite")
 SUBNET_DATA_PATH = os.path.join(DEFAULT_DATA_DIR, "subnet_data.json")
 VALIDATOR_DATA_PATH = os.path.join(DEFAULT_DATA_DIR, "validator_data.json")
 
+def _atomic_write_json(path, data):
+    """Write JSON to a temp file and atomically replace the target.
+
+    The temp-then-replace dance means a crash mid-write leaves the
+    previous file intact. orjson encodes in one C call and the buffer
+    goes out through a single os.write — no file-object buffering, one
+    syscall plus the fsync.
+    """
+    buf = orjson.dumps(data)
+    tmp_path = f"{path}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.write(fd, buf)
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    os.replace(tmp_path, path)
+
 class DataCache:
     """Cache for Bittensor data"""
     
     def __init__(self, 
-                 validator_metadata_path=VALIDATOR_METADATA_PATH, 
+                 validator_metadata_path=VALIDATOR_METADATA_DB_PATH, 
                  subnet_data_path=SUBNET_DATA_PATH, 
                  validator_data_path=VALIDATOR_DATA_PATH):
         """Initialize the cache"""
@@ -39,39 +60,68 @@ class DataCache:
         # Make sure data directory exists
         os.makedirs(os.path.dirname(validator_metadata_path), exist_ok=True)
         
+        # Validator metadata lives in SQLite so lookups by hotkey are
+        # keyed reads instead of a whole-file parse at startup
+        self._meta_db = sqlite3.connect(validator_metadata_path, check_same_thread=False)
+        self._meta_db.execute(
+            "CREATE TABLE IF NOT EXISTS meta (hotkey TEXT PRIMARY KEY, data BLOB)"
+        )
+        self._migrate_legacy_metadata()
+        
         # Cache data
-        self.validator_metadata = {}
         self.subnet_data = {}
         self.validator_data = {}
         
-        # Cache update times
-        self.validator_metadata_updated = None
-        self.subnet_data_updated = None
-        self.validator_data_updated = None
+        # Cache update times (monotonic ns: immune to wall-clock jumps)
+        self.validator_metadata_updated_ns = None
+        self.subnet_data_updated_ns = None
+        self.validator_data_updated_ns = None
         
         # Load cache from disk
         self.load_cache()
         
-        # Lock for thread safety
+        # Lock serializing writers; readers are lock-free (see get_*)
         self.lock = threading.Lock()
+        # Dirty flags per bucket; a burst of updates coalesces into one
+        # disk write when the flusher next wakes up. last_save_failed is
+        # the error signal for callers of the fire-and-forget update_*
+        self._dirty = {"subnet": False, "validator": False}
+        self.last_save_failed = False
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flusher.start()
+        # The flusher is a daemon thread; flush dirty buckets at exit so
+        # acknowledged updates are not lost on shutdown
+        atexit.register(self.close)
+    
+    def _migrate_legacy_metadata(self):
+        """One-shot import of the legacy JSON metadata file into SQLite"""
+        count = self._meta_db.execute("SELECT COUNT(*) FROM meta").fetchone()[0]
+        if count or not os.path.exists(VALIDATOR_METADATA_PATH):
+            return
+        
+        try:
+            with open(VALIDATOR_METADATA_PATH, 'rb') as f:
+                legacy = orjson.loads(f.read())
+            with self._meta_db:
+                self._meta_db.executemany(
+                    "INSERT OR REPLACE INTO meta (hotkey, data) VALUES (?, ?)",
+                    ((hotkey, orjson.dumps(doc)) for hotkey, doc in legacy.items())
+                )
+            logger.info(f"Migrated metadata for {len(legacy)} validators to SQLite")
+        except Exception as e:
+            logger.error(f"Error migrating legacy metadata: {str(e)}")
     
     def load_cache(self):
         """Load cache from disk"""
-        # Load validator metadata
-        if os.path.exists(self.validator_metadata_path):
-            try:
-                with open(self.validator_metadata_path, 'r') as f:
-                    self.validator_metadata = json.load(f)
-                logger.info(f"Loaded validator metadata for {len(self.validator_metadata)} validators")
-            except Exception as e:
-                logger.error(f"Error loading validator metadata: {str(e)}")
-                self.validator_metadata = {}
+        # Validator metadata stays on disk; log the row count only
+        count = self._meta_db.execute("SELECT COUNT(*) FROM meta").fetchone()[0]
+        logger.info(f"Validator metadata store holds {count} validators")
         
         # Load subnet data
         if os.path.exists(self.subnet_data_path):
             try:
-                with open(self.subnet_data_path, 'r') as f:
-                    self.subnet_data = json.load(f)
+                with open(self.subnet_data_path, 'rb') as f:
+                    self.subnet_data = orjson.loads(f.read())
                 logger.info(f"Loaded data for {len(self.subnet_data)} subnets")
             except Exception as e:
                 logger.error(f"Error loading subnet data: {str(e)}")
@@ -80,47 +130,68 @@ class DataCache:
         # Load validator data
         if os.path.exists(self.validator_data_path):
             try:
-                with open(self.validator_data_path, 'r') as f:
-                    self.validator_data = json.load(f)
+                with open(self.validator_data_path, 'rb') as f:
+                    self.validator_data = orjson.loads(f.read())
                 logger.info(f"Loaded data for {len(self.validator_data)} validators")
             except Exception as e:
                 logger.error(f"Error loading validator data: {str(e)}")
                 self.validator_data = {}
     
     def save_validator_metadata(self):
-        """Save validator metadata to disk"""
+        """Flush pending validator metadata writes to disk"""
         with self.lock:
             try:
-                # Create backup first
-                if os.path.exists(self.validator_metadata_path):
-                    backup_path = f"{self.validator_metadata_path}.bak"
-                    os.rename(self.validator_metadata_path, backup_path)
-                
-                # Save new data
-                with open(self.validator_metadata_path, 'w') as f:
-                    json.dump(self.validator_metadata, f, indent=2)
-                
-                self.validator_metadata_updated = datetime.now()
-                logger.info(f"Saved metadata for {len(self.validator_metadata)} validators")
+                # Updates are transactional; nothing to rewrite wholesale
+                self._meta_db.commit()
                 return True
             except Exception as e:
                 logger.error(f"Error saving validator metadata: {str(e)}")
                 return False
     
+    def _flush_loop(self, interval=0.5):
+        """Write dirty buckets to disk, coalescing bursts of updates"""
+        while True:
+            time.sleep(interval)
+            self.flush()
+    
+    def flush(self) -> bool:
+        """Write any dirty buckets out now; returns overall success.
+
+        Buckets stay dirty when their save fails, so the flusher keeps
+        retrying until the write lands. Callers needing durability
+        beyond the fire-and-forget update_* methods can call this
+        directly and check the result.
+        """
+        ok = True
+        if self._dirty["subnet"]:
+            if self.save_subnet_data():
+                self._dirty["subnet"] = False
+            else:
+                ok = False
+        if self._dirty["validator"]:
+            if self.save_validator_data():
+                self._dirty["validator"] = False
+            else:
+                ok = False
+        if not ok or self.last_save_failed:
+            self.last_save_failed = not ok
+        return ok
+    
+    def close(self):
+        """Flush pending writes and commit the metadata store"""
+        self.flush()
+        try:
+            self._meta_db.commit()
+        except Exception as e:
+            logger.error(f"Error committing metadata store on close: {str(e)}")
+    
     def save_subnet_data(self):
         """Save subnet data to disk"""
         with self.lock:
             try:
-                # Create backup first
-                if os.path.exists(self.subnet_data_path):
-                    backup_path = f"{self.subnet_data_path}.bak"
-                    os.rename(self.subnet_data_path, backup_path)
+                _atomic_write_json(self.subnet_data_path, self.subnet_data)
                 
-                # Save new data
-                with open(self.subnet_data_path, 'w') as f:
-                    json.dump(self.subnet_data, f, indent=2)
-                
-                self.subnet_data_updated = datetime.now()
+                self.subnet_data_updated_ns = time.monotonic_ns()
                 logger.info(f"Saved data for {len(self.subnet_data)} subnets")
                 return True
             except Exception as e:
@@ -131,16 +202,9 @@ class DataCache:
         """Save validator data to disk"""
         with self.lock:
             try:
-                # Create backup first
-                if os.path.exists(self.validator_data_path):
-                    backup_path = f"{self.validator_data_path}.bak"
-                    os.rename(self.validator_data_path, backup_path)
-                
-                # Save new data
-                with open(self.validator_data_path, 'w') as f:
-                    json.dump(self.validator_data, f, indent=2)
+                _atomic_write_json(self.validator_data_path, self.validator_data)
                 
-                self.validator_data_updated = datetime.now()
+                self.validator_data_updated_ns = time.monotonic_ns()
                 logger.info(f"Saved data for {len(self.validator_data)} validators")
                 return True
             except Exception as e:
@@ -149,64 +213,71 @@ class DataCache:
     
     def update_validator_metadata(self, metadata: Dict[str, Any]) -> bool:
         """Update validator metadata"""
-        with self.lock:
-            self.validator_metadata.update(metadata)
-            return self.save_validator_metadata()
+        try:
+            # One transaction upserts only the touched hotkeys; untouched
+            # rows are never rewritten
+            with self.lock, self._meta_db:
+                self._meta_db.executemany(
+                    "INSERT OR REPLACE INTO meta (hotkey, data) VALUES (?, ?)",
+                    ((hotkey, orjson.dumps(doc)) for hotkey, doc in metadata.items())
+                )
+            self.validator_metadata_updated_ns = time.monotonic_ns()
+            return True
+        except Exception as e:
+            logger.error(f"Error updating validator metadata: {str(e)}")
+            return False
     
     def update_subnet_data(self, data: Dict[str, Any]) -> bool:
         """Update subnet data"""
-        with self.lock:
-            self.subnet_data = data
-            return self.save_subnet_data()
+        self.subnet_data = data
+        self._dirty["subnet"] = True
+        return True
     
     def update_validator_data(self, data: Dict[str, Any]) -> bool:
         """Update validator data"""
-        with self.lock:
-            self.validator_data = data
-            return self.save_validator_data()
+        self.validator_data = data
+        self._dirty["validator"] = True
+        return True
     
     def get_validator_metadata(self, hotkey: str = None) -> Dict[str, Any]:
         """Get validator metadata"""
-        with self.lock:
-            if hotkey:
-                return self.validator_metadata.get(hotkey, {})
-            return self.validator_metadata
+        if hotkey:
+            row = self._meta_db.execute(
+                "SELECT data FROM meta WHERE hotkey = ?", (hotkey,)
+            ).fetchone()
+            return orjson.loads(row[0]) if row else {}
+        return {
+            hotkey: orjson.loads(data)
+            for hotkey, data in self._meta_db.execute("SELECT hotkey, data FROM meta")
+        }
     
     def get_subnet_data(self) -> Dict[str, Any]:
         """Get subnet data"""
-        with self.lock:
-            return self.subnet_data
+        return self.subnet_data
     
     def get_validator_data(self, hotkey: str = None) -> Dict[str, Any]:
         """Get validator data"""
-        with self.lock:
-            if hotkey:
-                return self.validator_data.get(hotkey, {})
-            return self.validator_data
+        if hotkey:
+            return self.validator_data.get(hotkey, {})
+        return self.validator_data
     
     def is_validator_metadata_stale(self, max_age_seconds: int = 3600) -> bool:
         """Check if validator metadata is stale"""
-        if not self.validator_metadata_updated:
+        if self.validator_metadata_updated_ns is None:
             return True
-        
-        age = (datetime.now() - self.validator_metadata_updated).total_seconds()
-        return age > max_age_seconds
+        return time.monotonic_ns() - self.validator_metadata_updated_ns > max_age_seconds * 1_000_000_000
     
     def is_subnet_data_stale(self, max_age_seconds: int = 3600) -> bool:
         """Check if subnet data is stale"""
-        if not self.subnet_data_updated:
+        if self.subnet_data_updated_ns is None:
             return True
-        
-        age = (datetime.now() - self.subnet_data_updated).total_seconds()
-        return age > max_age_seconds
+        return time.monotonic_ns() - self.subnet_data_updated_ns > max_age_seconds * 1_000_000_000
     
     def is_validator_data_stale(self, max_age_seconds: int = 3600) -> bool:
         """Check if validator data is stale"""
-        if not self.validator_data_updated:
+        if self.validator_data_updated_ns is None:
             return True
-        
-        age = (datetime.now() - self.validator_data_updated).total_seconds()
-        return age > max_age_seconds
+        return time.monotonic_ns() - self.validator_data_updated_ns > max_age_seconds * 1_000_000_000
 
 # Create global cache instance
 cache = DataCache()
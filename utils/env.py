@@ -1,9 +1,21 @@
 import os
+from functools import lru_cache
 
 OTF_ARCHIVE_NODE = "wss://archive.chain.opentensor.ai:443"
 
+# No websocket compression knob here: the pinned websockets release
+# already defaults compression="deflate", so permessage-deflate is
+# offered on every substrate connection without any plumbing
+
+@lru_cache(maxsize=1)
 def parse_env_data():
     node = os.getenv("NODE") or OTF_ARCHIVE_NODE
-    batch_size = os.getenv("BATCH_SIZE") or 100
+    raw_batch_size = os.getenv("BATCH_SIZE") or "100"
+    try:
+        batch_size = int(raw_batch_size)
+    except ValueError:
+        raise ValueError(f"BATCH_SIZE must be an integer, got {raw_batch_size!r}") from None
+    if not 1 <= batch_size <= 10000:
+        raise ValueError(f"BATCH_SIZE must be between 1 and 10000, got {batch_size}")
 
-    return [node, int(batch_size)]
+    return (node, batch_size)